@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Transaction ID Migration Script
+Rewrites stored MD5 transaction IDs as the BLAKE2b IDs the parser now generates
+
+IDs are hashes of the same fields as before, so without this a statement
+imported before the switch is no longer recognised as a duplicate when it is
+uploaded again. Documents whose ID is not the MD5 of their own fields (already
+migrated, or imported from elsewhere) are left alone. If a re-upload already
+added a BLAKE2b copy of a transaction, that copy is removed and the original
+document keeps its category and timestamps.
+
+Usage:
+    python migrate_transaction_ids.py [--dry-run]
+"""
+
+import sys
+import os
+import hashlib
+import logging
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.transactionParser import transaction_id_source
+
+log = logging.getLogger(__name__)
+
+
+def migrate_transaction_ids(collection, dry_run=False):
+    """
+    Replace MD5 transaction IDs with BLAKE2b IDs
+
+    Args:
+        collection: pymongo collection holding the transactions
+        dry_run (bool): Only count what would change
+
+    Returns:
+        dict: Counts of migrated, removed duplicate and skipped documents
+    """
+    counts = {'migrated': 0, 'duplicates_removed': 0, 'skipped': 0}
+    fields = {'id': 1, 'userId': 1, 'date': 1, 'amount': 1, 'description': 1, 'balance': 1}
+
+    for doc in collection.find({}, fields):
+        # Rebuild the values the parser hashed: dates were 'YYYY-MM-DD' strings
+        # and amounts floats (the Node driver may store whole numbers as ints)
+        balance = doc.get('balance')
+        unique_string = transaction_id_source(
+            doc['userId'],
+            doc['date'].strftime('%Y-%m-%d'),
+            float(doc['amount']),
+            doc['description'],
+            float(balance) if balance is not None else None
+        )
+
+        if hashlib.md5(unique_string.encode()).hexdigest() != doc['id']:
+            counts['skipped'] += 1
+            continue
+
+        new_id = hashlib.blake2b(unique_string.encode(), digest_size=16).hexdigest()
+        duplicate = collection.find_one({'id': new_id}, {'_id': 1})
+
+        if not dry_run:
+            if duplicate:
+                collection.delete_one({'_id': duplicate['_id']})
+            collection.update_one({'_id': doc['_id']}, {'$set': {'id': new_id}})
+
+        counts['migrated'] += 1
+        if duplicate:
+            counts['duplicates_removed'] += 1
+
+    return counts
+
+
+def main():
+    """Main entry point"""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    dry_run = '--dry-run' in sys.argv[1:]
+
+    # Same variables as the API server (config/dbConfig.js reads .env.local)
+    load_dotenv('.env.local')
+    load_dotenv()
+    mongo_uri = os.getenv('MONGODB_URI')
+    if not mongo_uri:
+        log.error("MONGODB_URI is not set")
+        sys.exit(1)
+
+    client = MongoClient(mongo_uri)
+    try:
+        # Collection used by the Mongoose 'Transaction' model
+        collection = client.get_default_database()['transactions']
+        counts = migrate_transaction_ids(collection, dry_run=dry_run)
+    finally:
+        client.close()
+
+    prefix = "[DRY RUN] " if dry_run else ""
+    log.info(f"{prefix}Migrated: {counts['migrated']}")
+    log.info(f"{prefix}Re-imported duplicates removed: {counts['duplicates_removed']}")
+    log.info(f"{prefix}Skipped (not MD5 ids): {counts['skipped']}")
+
+
+if __name__ == "__main__":
+    main()
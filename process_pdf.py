@@ -7,8 +7,12 @@ Extracts transaction data from bank statement PDFs using ML/NLP
 
 import sys
 import os
-import json
+import logging
+import orjson
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import islice
+from operator import attrgetter
 import io
 
 # Fix Windows console encoding issues
@@ -23,145 +27,222 @@ from services.pdfExtractor import PDFExtractor
 from services.transactionParser import TransactionParser
 from services.categoryClassifier import CategoryClassifier
 
+log = logging.getLogger(__name__)
 
-def process_pdf(pdf_path, user_id):
+
+def configure_logging(level=logging.INFO):
+    """Send progress messages to stderr through logging (no-op if already configured)"""
+    logging.basicConfig(level=level, format='%(message)s', stream=sys.stderr)
+
+
+# File name of the PDF a batch worker is processing, used to prefix its log lines
+_worker_pdf_name = None
+
+
+class _WorkerLogFormatter(logging.Formatter):
+    """Prefix each log line with the PDF it belongs to, as batch workers interleave"""
+    
+    def format(self, record):
+        # Leading blank lines would separate the prefix from the message
+        return f"[{_worker_pdf_name}] {super().format(record).lstrip(chr(10))}"
+
+
+def _configure_worker_logging(level):
+    """Set up logging in a batch worker process"""
+    configure_logging(level)
+    for handler in logging.getLogger().handlers:
+        handler.setFormatter(_WorkerLogFormatter('%(message)s'))
+
+
+def summarize_totals(transactions):
+    """
+    Compute debit/credit totals and counts in a single pass
+    
+    Returns:
+        tuple: (total_debit, total_credit, debit_count, credit_count)
+    """
+    total_debit = total_credit = 0
+    debit_count = credit_count = 0
+    
+    for t in transactions:
+        trans_type = t.type
+        if trans_type == 'Debit':
+            total_debit += t.amount
+            debit_count += 1
+        elif trans_type == 'Credit':
+            total_credit += t.amount
+            credit_count += 1
+    
+    return total_debit, total_credit, debit_count, credit_count
+
+
+def extract_transactions(extractor, pdf_path, user_id, need_tables=False):
+    """
+    Extract PDF content and parse it into transactions
+    
+    Args:
+        extractor (PDFExtractor): Extractor used for the PDF content
+        pdf_path (str): Path to the PDF file
+        user_id (str): User identifier
+        need_tables (bool): Re-extract with pdfplumber, reusing the extractor's
+            earlier PyMuPDF pass
+    
+    Returns:
+        list: Parsed transactions
+    """
+    
+    # Step 1: Extract text and tables from PDF
+    log.info("Step 1: Extracting PDF content...")
+    log.info("-" * 60)
+    
+    if need_tables:
+        extracted_data = extractor.extract_pdfplumber(pdf_path)
+    else:
+        extracted_data = extractor.extract(pdf_path)
+    
+    log.info(f"[OK] Extracted {extracted_data['pages']} pages")
+    log.info(f"[OK] Found {len(extracted_data['tables'])} tables")
+    log.info(f"[OK] Text length: {extracted_data['text_length']} characters")
+    
+    # Step 2: Parse transactions
+    log.info("\nStep 2: Parsing transactions...")
+    log.info("-" * 60)
+    
+    parser = TransactionParser()
+    # Transactions keyed by ID (first one wins), so rows sharing an ID are kept
+    # once whether or not text extraction runs below
+    merged = {}
+    
+    # Try table-based extraction first (PREFERRED for structured data)
+    table_transactions = []
+    if extracted_data['tables']:
+        log.info("-> Attempting table-based extraction...")
+        table_data = extractor.extract_from_tables()
+        
+        if table_data:
+            log.info(f"  Found {len(table_data)} rows in tables")
+            table_transactions = parser.parse_transactions_from_table(table_data, user_id)
+            for trans in table_transactions:
+                merged.setdefault(trans.id, trans)
+            log.info(f"[OK] Extracted {len(table_transactions)} transactions from tables")
+        else:
+            log.info("  No structured table data found")
+    
+    # Also try text-based extraction if table results seem incomplete
+    # BUT: Use smarter deduplication to avoid double-counting
+    # Text extraction helps find transactions that pdfplumber missed in table form
+    expected_min_transactions = 25  # Use text if tables gave <25 transactions
+    
+    if len(table_transactions) < expected_min_transactions:
+        log.info(f"-> Attempting text-based extraction (table gave {len(table_transactions)} < {expected_min_transactions})...")
+        log.info(f"  Processing text lines from {len(extractor.text_content)} pages")
+        
+        # Stream lines page by page instead of materializing the full list
+        text_transactions = parser.parse_transactions_from_text(extractor.iter_text_lines(), user_id)
+        
+        # Smarter deduplication:
+        # 1. If same (date, amount) - definitely duplicate, skip
+        # 2. If same date but different amount - TRUST the table amount, skip text version
+        # The ID-keyed dict doubles as the ID lookup
+        existing_date_amounts = {(t.date, t.amount) for t in merged.values()}
+        existing_dates = {t.date for t in merged.values()}  # Track dates for conflict resolution
+        new_count = 0
+        skipped_conflict = 0
+        
+        for trans in text_transactions:
+            signature = (trans.date, trans.amount)
+            
+            # Skip exact duplicates
+            if trans.id in merged or signature in existing_date_amounts:
+                continue
+            
+            # If this date already exists in tables (different amount), skip
+            # Trust table extraction for amounts when dates match
+            if trans.date in existing_dates:
+                skipped_conflict += 1
+                continue
+                
+            # This is a genuinely new transaction from text
+            merged[trans.id] = trans
+            existing_date_amounts.add(signature)
+            existing_dates.add(trans.date)
+            new_count += 1
+        
+        log.info(f"[OK] Extracted {len(text_transactions)} from text ({new_count} new, {skipped_conflict} date conflicts skipped)")
+    else:
+        log.info(f"-> Skipping text extraction (table gave {len(table_transactions)} >= {expected_min_transactions})")
+    
+    transactions = list(merged.values())
+    log.info(f"[OK] Total unique transactions: {len(transactions)}")
+    
+    return transactions
+
+
+def process_pdf(pdf_path, user_id, banner_level=logging.INFO):
     """
     Main function to process a single PDF and extract transactions
     
     Args:
         pdf_path (str): Path to the PDF file
         user_id (str): User identifier
+        banner_level (int): Log level for the per-PDF banner
     
     Returns:
         list: Extracted transactions or None if failed
     """
     
-    print(f"\n{'='*60}")
-    print(f"Processing PDF: {pdf_path}")
-    print(f"User ID: {user_id}")
-    print(f"{'='*60}\n")
+    log.log(banner_level, f"\n{'='*60}")
+    log.log(banner_level, f"Processing PDF: {pdf_path}")
+    log.log(banner_level, f"User ID: {user_id}")
+    log.log(banner_level, f"{'='*60}\n")
     
     # Check if file exists
     if not os.path.exists(pdf_path):
-        print(f"[ERROR] File not found - {pdf_path}")
+        log.error(f"File not found - {pdf_path}")
         return None
     
     try:
-        # Step 1: Extract text and tables from PDF
-        print("Step 1: Extracting PDF content...")
-        print("-" * 60)
-        
         extractor = PDFExtractor()
-        extracted_data = extractor.extract(pdf_path)
-        
-        print(f"[OK] Extracted {extracted_data['pages']} pages")
-        print(f"[OK] Found {len(extracted_data['tables'])} tables")
-        print(f"[OK] Text length: {len(extracted_data['text'])} characters")
-        
-        # Step 2: Parse transactions
-        print("\nStep 2: Parsing transactions...")
-        print("-" * 60)
-        
-        parser = TransactionParser()
-        transactions = []
-        
-        # Try table-based extraction first (PREFERRED for structured data)
-        table_transactions = []
-        if extracted_data['tables']:
-            print("-> Attempting table-based extraction...")
-            table_data = extractor.extract_from_tables()
-            
-            if table_data:
-                print(f"  Found {len(table_data)} rows in tables")
-                table_transactions = parser.parse_transactions_from_table(table_data, user_id)
-                transactions.extend(table_transactions)
-                print(f"[OK] Extracted {len(table_transactions)} transactions from tables")
-            else:
-                print("  No structured table data found")
-        
-        # Also try text-based extraction if table results seem incomplete
-        # BUT: Use smarter deduplication to avoid double-counting
-        # Text extraction helps find transactions that pdfplumber missed in table form
-        expected_min_transactions = 25  # Use text if tables gave <25 transactions
-        
-        if len(table_transactions) < expected_min_transactions:
-            print(f"-> Attempting text-based extraction (table gave {len(table_transactions)} < {expected_min_transactions})...")
-            text_lines = extractor.get_text_lines()
-            print(f"  Processing {len(text_lines)} text lines")
-            
-            text_transactions = parser.parse_transactions_from_text(text_lines, user_id)
-            
-            # Smarter deduplication:
-            # 1. If same (date, amount) - definitely duplicate, skip
-            # 2. If same date but different amount - TRUST the table amount, skip text version
-            existing_ids = {t['id'] for t in transactions}
-            existing_date_amounts = {(t['date'], t['amount']) for t in transactions}
-            existing_dates = {t['date'] for t in transactions}  # Track dates for conflict resolution
-            new_count = 0
-            skipped_conflict = 0
-            
-            for trans in text_transactions:
-                signature = (trans['date'], trans['amount'])
-                
-                # Skip exact duplicates
-                if trans['id'] in existing_ids or signature in existing_date_amounts:
-                    continue
-                
-                # If this date already exists in tables (different amount), skip
-                # Trust table extraction for amounts when dates match
-                if trans['date'] in existing_dates:
-                    skipped_conflict += 1
-                    continue
-                    
-                # This is a genuinely new transaction from text
-                transactions.append(trans)
-                existing_ids.add(trans['id'])
-                existing_date_amounts.add(signature)
-                existing_dates.add(trans['date'])
-                new_count += 1
-            
-            print(f"[OK] Extracted {len(text_transactions)} from text ({new_count} new, {skipped_conflict} date conflicts skipped)")
-        else:
-            print(f"-> Skipping text extraction (table gave {len(table_transactions)} >= {expected_min_transactions})")
+        transactions = extract_transactions(extractor, pdf_path, user_id)
         
-        print(f"[OK] Total unique transactions: {len(transactions)}")
+        # PyMuPDF found nothing usable - retry with pdfplumber's table finder,
+        # unless extract() already fell back to pdfplumber
+        if not transactions and not extractor.used_pdfplumber:
+            log.info("\n-> No transactions found, retrying with pdfplumber tables...")
+            transactions = extract_transactions(extractor, pdf_path, user_id, need_tables=True)
         
         # Check if we found any transactions
         if not transactions:
-            print("\n[WARNING] No transactions found!")
-            print("\nPossible reasons:")
-            print("  1. The PDF format is not recognized")
-            print("  2. The PDF doesn't contain transaction data")
-            print("  3. The extraction patterns need adjustment")
-            print("\nTip: Check the first few lines of extracted text:")
-            print("-" * 60)
-            for i, line in enumerate(text_lines[:10]):
-                print(f"{i+1}. {line[:80]}")
-            print("-" * 60)
+            log.warning("\nNo transactions found!")
+            log.info("\nPossible reasons:")
+            log.info("  1. The PDF format is not recognized")
+            log.info("  2. The PDF doesn't contain transaction data")
+            log.info("  3. The extraction patterns need adjustment")
+            log.info("\nTip: Check the first few lines of extracted text:")
+            log.info("-" * 60)
+            for i, line in enumerate(islice(extractor.iter_text_lines(), 10)):
+                log.info(f"{i+1}. {line[:80]}")
+            log.info("-" * 60)
             return None
         
         # Step 3: Classify transactions into categories
-        print("\nStep 3: Classifying transactions...")
-        print("-" * 60)
+        log.info("\nStep 3: Classifying transactions...")
+        log.info("-" * 60)
         
         classifier = CategoryClassifier()
         transactions = classifier.classify_transactions(transactions)
-        print("[OK] Categories assigned to all transactions")
+        log.info("[OK] Categories assigned to all transactions")
         
         # Step 4: Sort transactions by date (newest first)
-        # Secondary sort: Opening Balance should be "oldest" (last in descending)
-        def sort_key(t):
-            date_val = t['date']
-            # If description contains 'opening balance', treat it as smaller (older) transaction on that day
-            is_opening = 1 if 'opening balance' in t['description'].lower() else 2
-            return (date_val, is_opening)
-            
-        transactions.sort(key=sort_key, reverse=True)
-        print("[OK] Transactions sorted by date")
+        # Secondary sort: Opening Balance should be "oldest" (last in descending).
+        # Dates are ISO (YYYY-MM-DD) strings, so they sort chronologically as-is.
+        transactions.sort(key=lambda t: (t.date, 'opening balance' not in t.description.lower()),
+                          reverse=True)
+        log.info("[OK] Transactions sorted by date")
         
         # Step 5: Save to JSON file
-        print("\nStep 4: Saving extracted data...")
-        print("-" * 60)
+        log.info("\nStep 4: Saving extracted data...")
+        log.info("-" * 60)
         
         output_dir = 'extracted'
         os.makedirs(output_dir, exist_ok=True)
@@ -174,34 +255,31 @@ def process_pdf(pdf_path, user_id):
             f'transactions_{user_id}_{pdf_filename}_{timestamp}.json'
         )
         
-        # Save transactions to JSON
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(transactions, f, indent=2, ensure_ascii=False)
+        # Save transactions to JSON (orjson emits UTF-8 bytes)
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(transactions, option=orjson.OPT_INDENT_2))
         
-        print(f"[OK] Transactions saved to: {output_file}")
+        log.info(f"[OK] Transactions saved to: {output_file}")
         
         # Step 6: Print summary statistics
-        print("\n" + "="*60)
-        print("EXTRACTION SUMMARY")
-        print("="*60)
+        log.info("\n" + "="*60)
+        log.info("EXTRACTION SUMMARY")
+        log.info("="*60)
         
-        print(f"\n[STATS] Overall Statistics:")
-        print(f"  Total Transactions: {len(transactions)}")
-        print(f"  Date Range: {transactions[-1]['date']} to {transactions[0]['date']}")
+        log.info(f"\n[STATS] Overall Statistics:")
+        log.info(f"  Total Transactions: {len(transactions)}")
+        log.info(f"  Date Range: {transactions[-1].date} to {transactions[0].date}")
         
         # Calculate totals
-        total_debit = sum(t['amount'] for t in transactions if t['type'] == 'Debit')
-        total_credit = sum(t['amount'] for t in transactions if t['type'] == 'Credit')
-        debit_count = sum(1 for t in transactions if t['type'] == 'Debit')
-        credit_count = sum(1 for t in transactions if t['type'] == 'Credit')
+        total_debit, total_credit, debit_count, credit_count = summarize_totals(transactions)
         
-        print(f"\n[STATS] Financial Summary:")
-        print(f"  Total Debits:  Rs.{total_debit:,.2f} ({debit_count} transactions)")
-        print(f"  Total Credits: Rs.{total_credit:,.2f} ({credit_count} transactions)")
-        print(f"  Net Amount:    Rs.{(total_credit - total_debit):,.2f}")
+        log.info(f"\n[STATS] Financial Summary:")
+        log.info(f"  Total Debits:  Rs.{total_debit:,.2f} ({debit_count} transactions)")
+        log.info(f"  Total Credits: Rs.{total_credit:,.2f} ({credit_count} transactions)")
+        log.info(f"  Net Amount:    Rs.{(total_credit - total_debit):,.2f}")
         
         # Category breakdown
-        print(f"\n[STATS] Category Breakdown:")
+        log.info(f"\n[STATS] Category Breakdown:")
         category_stats = classifier.get_category_stats(transactions)
         
         # Sort categories by transaction count
@@ -212,21 +290,27 @@ def process_pdf(pdf_path, user_id):
         )
         
         for category, stats in sorted_categories:
-            print(f"  {category:15} : {stats['count']:3} transactions | "
+            log.info(f"  {category:15} : {stats['count']:3} transactions | "
                   f"Debit: Rs.{stats['total_debit']:>10,.2f} | "
                   f"Credit: Rs.{stats['total_credit']:>10,.2f}")
         
-        print("="*60 + "\n")
+        log.info("="*60 + "\n")
         
         return transactions
         
     except Exception as e:
-        print(f"\n[ERROR] Error processing PDF: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception(f"\nError processing PDF {pdf_path}: {e}")
         return None
 
 
+def _process_pdf_worker(args):
+    """Process a single PDF in a worker process (must be top-level to be picklable)"""
+    global _worker_pdf_name
+    pdf_path, user_id = args
+    _worker_pdf_name = os.path.basename(pdf_path)
+    return process_pdf(pdf_path, user_id, banner_level=logging.DEBUG)
+
+
 def process_multiple_pdfs(pdf_directory, user_id):
     """
     Process all PDF files in a directory
@@ -239,96 +323,93 @@ def process_multiple_pdfs(pdf_directory, user_id):
         list: All extracted transactions or None if failed
     """
     
-    print("\n" + "="*60)
-    print("BATCH PDF PROCESSING")
-    print("="*60)
+    log.info("\n" + "="*60)
+    log.info("BATCH PDF PROCESSING")
+    log.info("="*60)
     
     # Check if directory exists
     if not os.path.exists(pdf_directory):
-        print(f"[ERROR] Directory not found - {pdf_directory}")
+        log.error(f"Directory not found - {pdf_directory}")
         return None
     
     # Find all PDF files
     pdf_files = [f for f in os.listdir(pdf_directory) if f.lower().endswith('.pdf')]
     
     if not pdf_files:
-        print(f"[ERROR] No PDF files found in {pdf_directory}")
+        log.warning(f"No PDF files found in {pdf_directory}")
         return None
     
-    print(f"\n[INFO] Found {len(pdf_files)} PDF file(s) to process:")
+    log.info(f"\n[INFO] Found {len(pdf_files)} PDF file(s) to process:")
     for i, pdf_file in enumerate(pdf_files, 1):
-        print(f"  {i}. {pdf_file}")
-    print()
+        log.info(f"  {i}. {pdf_file}")
+    log.info("")
     
     all_transactions = []
     success_count = 0
     fail_count = 0
     
-    # Process each PDF
-    for i, pdf_file in enumerate(pdf_files, 1):
-        print(f"\n{'#'*60}")
-        print(f"Processing file {i}/{len(pdf_files)}: {pdf_file}")
-        print(f"{'#'*60}")
-        
-        pdf_path = os.path.join(pdf_directory, pdf_file)
-        transactions = process_pdf(pdf_path, user_id)
-        
+    # Workers write their own output files - make sure the directory exists first
+    os.makedirs('extracted', exist_ok=True)
+    
+    # Process PDFs in parallel, one document per worker process
+    pdf_paths = [os.path.join(pdf_directory, pdf_file) for pdf_file in pdf_files]
+    max_workers = min(os.cpu_count() or 1, len(pdf_paths))
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_configure_worker_logging,
+                             initargs=(logging.getLogger().getEffectiveLevel(),)) as executor:
+        results = list(executor.map(_process_pdf_worker, [(pdf_path, user_id) for pdf_path in pdf_paths]))
+    
+    for pdf_file, transactions in zip(pdf_files, results):
         if transactions:
             all_transactions.extend(transactions)
             success_count += 1
-            print(f"[SUCCESS] Successfully processed {pdf_file}")
+            log.info(f"[SUCCESS] Successfully processed {pdf_file}")
         else:
             fail_count += 1
-            print(f"[WARNING] Failed to process {pdf_file}")
+            log.warning(f"Failed to process {pdf_file}")
     
     # Remove duplicate transactions based on transaction ID
-    print("\n" + "="*60)
-    print("DEDUPLICATION")
-    print("="*60)
+    log.info("\n" + "="*60)
+    log.info("DEDUPLICATION")
+    log.info("="*60)
     
     original_count = len(all_transactions)
-    unique_transactions = {}
-    
-    for trans in all_transactions:
-        unique_transactions[trans['id']] = trans
-    
+    unique_transactions = {trans.id: trans for trans in all_transactions}
     all_transactions = list(unique_transactions.values())
     duplicate_count = original_count - len(all_transactions)
     
-    print(f"Original transactions: {original_count}")
-    print(f"Duplicates removed: {duplicate_count}")
-    print(f"Unique transactions: {len(all_transactions)}")
+    log.info(f"Original transactions: {original_count}")
+    log.info(f"Duplicates removed: {duplicate_count}")
+    log.info(f"Unique transactions: {len(all_transactions)}")
     
     # Save combined file
     if all_transactions:
         # Sort by date
-        all_transactions.sort(key=lambda x: x['date'], reverse=True)
+        all_transactions.sort(key=attrgetter('date'), reverse=True)
         
         # Save combined JSON
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         output_file = os.path.join('extracted', f'transactions_all_{user_id}_{timestamp}.json')
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(all_transactions, f, indent=2, ensure_ascii=False)
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(all_transactions, option=orjson.OPT_INDENT_2))
         
-        print(f"\n[OK] Combined transactions saved to: {output_file}")
+        log.info(f"\n[OK] Combined transactions saved to: {output_file}")
         
         # Final summary
-        print("\n" + "="*60)
-        print("BATCH PROCESSING SUMMARY")
-        print("="*60)
-        print(f"Files processed successfully: {success_count}/{len(pdf_files)}")
-        print(f"Files failed: {fail_count}/{len(pdf_files)}")
-        print(f"Total unique transactions: {len(all_transactions)}")
+        log.info("\n" + "="*60)
+        log.info("BATCH PROCESSING SUMMARY")
+        log.info("="*60)
+        log.info(f"Files processed successfully: {success_count}/{len(pdf_files)}")
+        log.info(f"Files failed: {fail_count}/{len(pdf_files)}")
+        log.info(f"Total unique transactions: {len(all_transactions)}")
         
         # Calculate totals
-        total_debit = sum(t['amount'] for t in all_transactions if t['type'] == 'Debit')
-        total_credit = sum(t['amount'] for t in all_transactions if t['type'] == 'Credit')
+        total_debit, total_credit, _, _ = summarize_totals(all_transactions)
         
-        print(f"\nTotal Debits: Rs.{total_debit:,.2f}")
-        print(f"Total Credits: Rs.{total_credit:,.2f}")
-        print(f"Net Amount: Rs.{(total_credit - total_debit):,.2f}")
-        print("="*60 + "\n")
+        log.info(f"\nTotal Debits: Rs.{total_debit:,.2f}")
+        log.info(f"Total Credits: Rs.{total_credit:,.2f}")
+        log.info(f"Net Amount: Rs.{(total_credit - total_debit):,.2f}")
+        log.info("="*60 + "\n")
     
     return all_transactions
 
@@ -359,6 +440,8 @@ def print_usage():
 def main():
     """Main entry point"""
     
+    configure_logging()
+    
     # Check arguments
     if len(sys.argv) < 2:
         print_usage()
@@ -379,10 +462,10 @@ def main():
     
     # Exit with appropriate code
     if result is not None:
-        print("[SUCCESS] Processing completed successfully!")
+        log.info("[SUCCESS] Processing completed successfully!")
         sys.exit(0)
     else:
-        print("[FAILED] Processing failed!")
+        log.info("[FAILED] Processing failed!")
         sys.exit(1)
 
 
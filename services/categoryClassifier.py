@@ -1,25 +1,86 @@
 import re
+from collections import defaultdict
+from functools import lru_cache
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
-import pickle
+import joblib
+import logging
 import os
 
+try:
+    import ahocorasick  # pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+log = logging.getLogger(__name__)
+
+# Keyword lists per category, in priority order (first match wins)
+DEFAULT_CATEGORIES = {
+    'Food': ['swiggy', 'zomato', 'restaurant', 'cafe', 'food', 'pizza', 'burger', 'dominos', 'mcdonalds', 'kfc'],
+    'Shopping': ['amazon', 'flipkart', 'myntra', 'ajio', 'shopping', 'mall', 'store', 'retail', 'market'],
+    'Bills': ['electricity', 'water', 'gas', 'bill', 'utility', 'recharge', 'mobile', 'broadband', 'internet'],
+    'Transportation': ['uber', 'ola', 'rapido', 'petrol', 'fuel', 'parking', 'toll', 'metro', 'bus', 'train'],
+    'Entertainment': ['netflix', 'spotify', 'hotstar', 'prime', 'movie', 'cinema', 'theatre', 'gaming', 'game'],
+    'Healthcare': ['hospital', 'pharmacy', 'medical', 'doctor', 'clinic', 'medicine', 'health', 'apollo', 'medplus'],
+    'Education': ['school', 'college', 'university', 'course', 'tuition', 'education', 'book', 'fees'],
+    'Investment': ['mutual fund', 'sip', 'stock', 'equity', 'investment', 'trading', 'zerodha', 'groww'],
+    'Transfer': ['transfer', 'upi', 'imps', 'neft', 'rtgs', 'sent to', 'received from'],
+    'ATM': ['atm', 'cash withdrawal', 'withdrawal'],
+    'Salary': ['salary', 'wage', 'income', 'payroll'],
+    'Other': []
+}
+
+
+def _build_matchers(categories):
+    """Compile keyword matchers for a category table
+    
+    Returns:
+        tuple: (category_patterns, automaton) - automaton is None without pyahocorasick
+    """
+    # One precompiled alternation per category, checked in priority order
+    category_patterns = [
+        (category, re.compile('|'.join(re.escape(keyword) for keyword in keywords)))
+        for category, keywords in categories.items()
+        if keywords
+    ]
+    
+    # Aho-Corasick automaton over all keywords: one linear scan per description.
+    # Each keyword maps to (priority, category); lower priority wins.
+    automaton = None
+    if ahocorasick is not None:
+        keyword_priority = {}
+        for priority, (category, keywords) in enumerate(categories.items()):
+            for keyword in keywords:
+                keyword_priority.setdefault(keyword, (priority, category))
+        
+        # An automaton without keywords cannot be searched
+        if not keyword_priority:
+            return category_patterns, None
+        
+        automaton = ahocorasick.Automaton()
+        for keyword, value in keyword_priority.items():
+            automaton.add_word(keyword, value)
+        automaton.make_automaton()
+    
+    return category_patterns, automaton
+
+
+# Built once at import and shared by every classifier using the default categories
+# (worker processes inherit it on fork)
+_DEFAULT_MATCHERS = _build_matchers(DEFAULT_CATEGORIES)
+
+
 class CategoryClassifier:
-    def __init__(self):
-        self.categories = {
-            'Food': ['swiggy', 'zomato', 'restaurant', 'cafe', 'food', 'pizza', 'burger', 'dominos', 'mcdonalds', 'kfc'],
-            'Shopping': ['amazon', 'flipkart', 'myntra', 'ajio', 'shopping', 'mall', 'store', 'retail', 'market'],
-            'Bills': ['electricity', 'water', 'gas', 'bill', 'utility', 'recharge', 'mobile', 'broadband', 'internet'],
-            'Transportation': ['uber', 'ola', 'rapido', 'petrol', 'fuel', 'parking', 'toll', 'metro', 'bus', 'train'],
-            'Entertainment': ['netflix', 'spotify', 'hotstar', 'prime', 'movie', 'cinema', 'theatre', 'gaming', 'game'],
-            'Healthcare': ['hospital', 'pharmacy', 'medical', 'doctor', 'clinic', 'medicine', 'health', 'apollo', 'medplus'],
-            'Education': ['school', 'college', 'university', 'course', 'tuition', 'education', 'book', 'fees'],
-            'Investment': ['mutual fund', 'sip', 'stock', 'equity', 'investment', 'trading', 'zerodha', 'groww'],
-            'Transfer': ['transfer', 'upi', 'imps', 'neft', 'rtgs', 'sent to', 'received from'],
-            'ATM': ['atm', 'cash withdrawal', 'withdrawal'],
-            'Salary': ['salary', 'wage', 'income', 'payroll'],
-            'Other': []
-        }
+    def __init__(self, categories=None):
+        if categories is None:
+            self.categories = dict(DEFAULT_CATEGORIES)
+            self.category_patterns, self.automaton = _DEFAULT_MATCHERS
+        else:
+            self.categories = categories
+            self.category_patterns, self.automaton = _build_matchers(categories)
+        
+        # Statements repeat the same merchants, so memoize per lowercased description
+        self._classify_cached = lru_cache(maxsize=4096)(self._classify_lowered)
         
         self.model = None
         self.vectorizer = None
@@ -28,33 +89,51 @@ class CategoryClassifier:
     
     def classify_rule_based(self, description):
         """Classify transaction using rule-based approach"""
-        description_lower = description.lower()
+        return self._classify_cached(description.lower())
+    
+    def _classify_lowered(self, description_lower):
+        """Rule-based classification of an already lowercased description"""
+        if self.automaton is not None:
+            best = None
+            for _, match in self.automaton.iter(description_lower):
+                if best is None or match < best:
+                    best = match
+            return best[1] if best else 'Other'
         
         # Check each category's keywords
-        for category, keywords in self.categories.items():
-            if category == 'Other':
-                continue
-            
-            for keyword in keywords:
-                if keyword in description_lower:
-                    return category
+        for category, pattern in self.category_patterns:
+            if pattern.search(description_lower):
+                return category
         
         return 'Other'
     
     def classify_transactions(self, transactions):
         """Classify a list of transactions"""
-        for transaction in transactions:
-            if 'description' in transaction:
-                transaction['category'] = self.classify_rule_based(transaction['description'])
-            else:
-                transaction['category'] = 'Other'
+        descriptions = [transaction.description or '' for transaction in transactions]
+        
+        # Decide the path once for the whole batch, not per transaction
+        if self.model is not None and self.vectorizer is not None:
+            categories = self._batch_ml(descriptions)
+        else:
+            categories = list(map(self.classify_rule_based, descriptions))
+        
+        for transaction, category in zip(transactions, categories):
+            transaction.category = category
         
         return transactions
     
+    def _batch_ml(self, descriptions):
+        """Classify many descriptions with a single transform + predict call"""
+        if not descriptions:
+            return []
+        
+        X = self.vectorizer.transform(descriptions)
+        return self.model.predict(X).tolist()
+    
     def train_ml_model(self, training_data):
         """Train ML model for category classification (optional enhancement)"""
         if not training_data:
-            print("No training data provided")
+            log.warning("No training data provided")
             return
         
         try:
@@ -71,58 +150,50 @@ class CategoryClassifier:
             
             # Save model
             os.makedirs('models', exist_ok=True)
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(self.model, f)
-            with open(self.vectorizer_path, 'wb') as f:
-                pickle.dump(self.vectorizer, f)
+            # Uncompressed so the arrays can be memory-mapped on load
+            joblib.dump(self.model, self.model_path, compress=0)
+            joblib.dump(self.vectorizer, self.vectorizer_path, compress=0)
             
-            print("ML model trained and saved successfully")
+            log.info("ML model trained and saved successfully")
         except Exception as e:
-            print(f"Error training model: {e}")
+            log.error(f"Error training model: {e}")
     
     def load_ml_model(self):
         """Load trained ML model"""
         try:
             if os.path.exists(self.model_path) and os.path.exists(self.vectorizer_path):
-                with open(self.model_path, 'rb') as f:
-                    self.model = pickle.load(f)
-                with open(self.vectorizer_path, 'rb') as f:
-                    self.vectorizer = pickle.load(f)
-                print("ML model loaded successfully")
+                # mmap_mode shares the model's arrays through the OS page cache
+                # instead of copying them onto the heap in every process
+                self.model = joblib.load(self.model_path, mmap_mode='r')
+                self.vectorizer = joblib.load(self.vectorizer_path, mmap_mode='r')
+                log.info("ML model loaded successfully")
                 return True
         except Exception as e:
-            print(f"Error loading model: {e}")
+            log.error(f"Error loading model: {e}")
         return False
     
     def classify_ml(self, description):
         """Classify using ML model if available"""
-        if self.model and self.vectorizer:
-            try:
-                X = self.vectorizer.transform([description])
-                prediction = self.model.predict(X)[0]
-                return prediction
-            except:
-                pass
+        if self.model is not None and self.vectorizer is not None:
+            return self._batch_ml([description])[0]
         
         # Fallback to rule-based
         return self.classify_rule_based(description)
     
     def get_category_stats(self, transactions):
         """Get statistics about categories"""
-        stats = {}
+        # [count, total_debit, total_credit] per category
+        totals = defaultdict(lambda: [0, 0, 0])
         
         for transaction in transactions:
-            category = transaction.get('category', 'Other')
-            trans_type = transaction.get('type', 'Debit')
-            amount = transaction.get('amount', 0)
-            
-            if category not in stats:
-                stats[category] = {'count': 0, 'total_debit': 0, 'total_credit': 0}
-            
-            stats[category]['count'] += 1
-            if trans_type == 'Debit':
-                stats[category]['total_debit'] += amount
+            entry = totals[transaction.category]
+            entry[0] += 1
+            if transaction.type == 'Debit':
+                entry[1] += transaction.amount
             else:
-                stats[category]['total_credit'] += amount
+                entry[2] += transaction.amount
         
-        return stats
\ No newline at end of file
+        return {
+            category: {'count': count, 'total_debit': total_debit, 'total_credit': total_credit}
+            for category, (count, total_debit, total_credit) in totals.items()
+        }
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""Per-line helpers for TransactionParser
+
+Kept in their own fully annotated module so they can be compiled with mypyc
+for a faster parse loop:
+
+    pip install mypy
+    cd services && mypyc parserHot.py
+
+Python imports the compiled extension in place of this file when it is
+present; delete the extension (services/parserHot.*.so or .pyd) to go back
+to the pure-Python version. Compiled patterns are passed in by the parser
+and typed as Any, since they may be re or RE2 patterns.
+"""
+from typing import Any, Callable, Optional, Sequence
+
+
+def clean_amount(amount_str: object, currency_strip_re: Any, non_numeric_re: Any) -> float:
+    """Clean and convert amount string to float"""
+    try:
+        text = str(amount_str)
+
+        # Check if this is a negative amount (reversal). Minus signs are rare,
+        # so only strip currency symbols and spaces when one is present.
+        is_negative = False
+        if '-' in text:
+            stripped: str = currency_strip_re.sub('', text)
+            is_negative = stripped.startswith('-') or '(-' in stripped or stripped.endswith('-')
+
+        # Keep only digits and decimal point (drops currency, commas and spaces in one pass)
+        cleaned: str = non_numeric_re.sub('', text)
+        if not cleaned:
+            return 0.0
+
+        # Check for multiple dots and handle them (keep only the last one if multiple)
+        if cleaned.count('.') > 1:
+            parts = cleaned.split('.')
+            cleaned = ''.join(parts[:-1]) + '.' + parts[-1]
+
+        amount = float(cleaned)
+
+        # Apply negative sign for reversals
+        return -amount if is_negative else amount
+    except Exception:
+        return 0.0
+
+
+def extract_date(text: str, date_re: Any, date_patterns: Sequence[Any],
+                 parse_date: Callable[[str], Optional[str]]) -> Optional[str]:
+    """Extract date from text"""
+    # date_re merges date_patterns into groups d0, d1, ...; one scan rules out
+    # the many lines without a date
+    match = date_re.search(text)
+    if not match:
+        return None
+
+    # The merged scan finds the leftmost date in any format, but the patterns
+    # are tried in order: an earlier pattern matching further along still wins
+    for pattern in date_patterns[:match.lastindex - 1]:
+        earlier = pattern.search(text, match.start())
+        if earlier:
+            return parse_date(earlier.group())
+    return parse_date(match.group())
+
+
+def _is_number_char(c: str) -> bool:
+    return c.isdecimal() or c == ','
+
+
+def strip_trailing_balance(text_lower: str) -> str:
+    r"""Remove a trailing balance amount ("1,234.56 cr") from lowercased text
+
+    Same result as re.sub(r'[\d,]+\.?\d*\s*(cr|dr)\.?\s*$', '', text_lower), but
+    scans back from the end once instead of trying the pattern at every digit.
+    """
+    # (cr|dr)\.?\s*$
+    i = len(text_lower.rstrip())
+    if i and text_lower[i - 1] == '.':
+        i -= 1
+    if text_lower[i - 2:i] not in ('cr', 'dr'):
+        return text_lower
+    i -= 2
+
+    # \s* before Cr/Dr - the amount must end where the whitespace starts
+    end = i
+    while end and text_lower[end - 1].isspace():
+        end -= 1
+
+    # [\d,]+\.?\d* ending at `end`, starting as far left as possible
+    start = end
+    while start and text_lower[start - 1].isdecimal():
+        start -= 1
+    if start and text_lower[start - 1] == '.':
+        # Digits and commas before the decimal point
+        int_start = start - 1
+        while int_start and _is_number_char(text_lower[int_start - 1]):
+            int_start -= 1
+        if int_start < start - 1:
+            return text_lower[:int_start]
+    else:
+        while start and _is_number_char(text_lower[start - 1]):
+            start -= 1
+    if start < end:
+        return text_lower[:start]
+    return text_lower
+
+
+def determine_transaction_type(text_lower: str, hint_type: Optional[str], debit_re: Any, credit_re: Any) -> str:
+    """Determine if transaction is debit or credit from lowercased text"""
+    # Check for explicit indicators in the FULL text (careful about "Cr" at end)
+
+    # Remove the Balance part (last amount + Cr) to avoid false positive
+    clean_text_lower = strip_trailing_balance(text_lower)
+
+    # 1. Start-of-line heuristics (Strongest)
+    if clean_text_lower.startswith('by ') or 'credit' in clean_text_lower or 'deposit' in clean_text_lower:
+        return 'Credit'
+    if clean_text_lower.startswith('to ') or 'debit' in clean_text_lower or 'withdrawal' in clean_text_lower:
+        return 'Debit'
+
+    # 2. Check for explicit keywords
+    if debit_re.search(clean_text_lower):
+        return 'Debit'
+
+    # For credit keywords, ensure we don't match "Cr" if it was removed or if it's just part of a word
+    # We already checked 'credit' and 'deposit' above.
+    if credit_re.search(clean_text_lower):
+        return 'Credit'
+
+    # 3. Use hint from amount extraction
+    if hint_type:
+        return hint_type.title()
+
+    # 4. Fallback Default
+    # For bank statements, ambiguity usually means Debit (spending/transfer out)
+    # UPI without "CREDIT" or "BY" is usually a payment.
+    return 'Debit'
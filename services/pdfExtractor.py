@@ -1,76 +1,255 @@
 import pdfplumber
 import fitz  # PyMuPDF
 import re
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import cached_property
+from operator import itemgetter
 import json
+import logging
+
+log = logging.getLogger(__name__)
+
+# Upper bound on pages handed to a single pdfplumber worker at once.
+# Keeps memory flat on very large statements (1000+ pages).
+MAX_PAGES_PER_CHUNK = 32
+
+# Cheap test for pages that may hold transactions: table headers or a DD/MM/YY(YY) date.
+# Pages without either (cover pages, T&C, ads) are skipped by pdfplumber.
+TRANSACTION_PAGE_PATTERN = re.compile(
+    r'date|particulars|narration|debit|credit|withdrawal|deposit|\d{2}[-/]\d{2}[-/]\d{2,4}',
+    re.IGNORECASE
+)
+
+# DD/MM/YY(YY) date inside a table cell
+DATE_CELL_PATTERN = re.compile(r'\d{2}[-/]\d{2}[-/]\d{2,4}')
+
+# Words whose tops are within this many points belong to the same visual line
+# (pdfplumber's default y_tolerance)
+LINE_Y_TOLERANCE = 3
+
+
+def _open_pdfplumber(source, pages=None):
+    """Open a PDF path or in-memory PDF bytes with pdfplumber"""
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    return pdfplumber.open(source, pages=pages)
+
+
+def _page_text_pymupdf(page):
+    """Page text with one line per visual line, like pdfplumber's extract_text
+    
+    page.get_text() puts each separately drawn text run on its own line, so
+    the cells of an unruled statement row (or its column headers) come out as
+    one-word lines. Words are grouped by their top coordinate instead and
+    joined left to right.
+    """
+    # (x0, y0, x1, y1, word, block_no, line_no, word_no)
+    words = sorted(page.get_text('words'), key=itemgetter(1))
+    
+    lines = []
+    current = []
+    previous_top = None
+    for word in words:
+        if current and word[1] - previous_top > LINE_Y_TOLERANCE:
+            lines.append(current)
+            current = []
+        current.append(word)
+        previous_top = word[1]
+    if current:
+        lines.append(current)
+    
+    return '\n'.join(' '.join(word[4] for word in sorted(line, key=itemgetter(0))) for line in lines)
+
+
+def _open_pymupdf(source):
+    """Open a PDF path or in-memory PDF bytes with PyMuPDF"""
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype='pdf')
+    return fitz.open(source)
+
 
 class PDFExtractor:
-    def __init__(self):
+    def __init__(self, max_workers=None, need_tables=False):
         self.text_content = []
         self.tables = []
+        # 1-based numbers of pages that look like they contain transactions
+        self.transaction_pages = []
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # When set, pdfplumber's table finder is used even if PyMuPDF succeeded
+        self.need_tables = need_tables
+        # Whether the last extraction ran pdfplumber (a retry would repeat it)
+        self.used_pdfplumber = False
+    
+    def _extract_page_chunk(self, source, page_numbers):
+        """Extract (page_number, text, tables) for a chunk of pages.
+        
+        Each worker opens its own pdfplumber handle: page objects share the
+        underlying pdfminer document and file stream, so they are not safe
+        to use from several threads at once.
+        """
+        results = []
+        with _open_pdfplumber(source, pages=page_numbers) as pdf:
+            for page in pdf.pages:
+                results.append((page.page_number, page.extract_text(), page.extract_tables()))
+        return results
+        
+    def extract_text_pdfplumber(self, source, pages=None):
+        """Extract text using pdfplumber, parsing pages in a thread pool
         
-    def extract_text_pdfplumber(self, pdf_path):
-        """Extract text using pdfplumber"""
+        Args:
+            source (str | bytes): PDF path or the PDF file contents
+            pages (list): Optional 1-based page numbers to restrict parsing to
+        """
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        self.text_content.append(text)
-                    
-                    # Extract tables
-                    tables = page.extract_tables()
-                    if tables:
-                        self.tables.extend(tables)
+            with _open_pdfplumber(source) as pdf:
+                total_pages = len(pdf.pages)
+            
+            # Split pages (1-based, as pdfplumber expects) into contiguous chunks
+            if pages:
+                page_numbers = [n for n in pages if 1 <= n <= total_pages]
+            else:
+                page_numbers = list(range(1, total_pages + 1))
+            page_count = len(page_numbers)
+            workers = max(1, min(self.max_workers, page_count))
+            chunk_size = min(MAX_PAGES_PER_CHUNK, -(-page_count // workers)) or 1
+            chunks = [page_numbers[i:i + chunk_size] for i in range(0, page_count, chunk_size)]
+            
+            # executor.map yields chunk results in submission order,
+            # so pages are reassembled in their original order
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                chunk_results = executor.map(lambda chunk: self._extract_page_chunk(source, chunk), chunks)
+                for chunk in chunk_results:
+                    for _, text, tables in chunk:
+                        if text:
+                            self.text_content.append(text)
+                        if tables:
+                            self.tables.extend(tables)
             
             return True
         except Exception as e:
-            print(f"Error extracting with pdfplumber: {e}")
+            log.error(f"Error extracting with pdfplumber: {e}")
             return False
     
-    def extract_text_pymupdf(self, pdf_path):
-        """Fallback: Extract text using PyMuPDF"""
+    def extract_text_pymupdf(self, source, find_tables=True):
+        """Extract text (and tables, where supported) using PyMuPDF
+        
+        Args:
+            source (str | bytes): PDF path or the PDF file contents
+            find_tables (bool): Run PyMuPDF's table finder on each page
+        """
         try:
-            doc = fitz.open(pdf_path)
+            doc = _open_pymupdf(source)
             for page_num in range(len(doc)):
                 page = doc.load_page(page_num)
-                text = page.get_text()
+                text = _page_text_pymupdf(page)
                 if text:
                     self.text_content.append(text)
+                    if TRANSACTION_PAGE_PATTERN.search(text):
+                        self.transaction_pages.append(page_num + 1)
+                
+                # Table detection is available from PyMuPDF 1.23
+                if find_tables and hasattr(page, 'find_tables'):
+                    for table in page.find_tables().tables:
+                        rows = table.extract()
+                        if rows:
+                            self.tables.append(rows)
             
             doc.close()
             return True
         except Exception as e:
-            print(f"Error extracting with PyMuPDF: {e}")
+            log.error(f"Error extracting with PyMuPDF: {e}")
             return False
     
-    def extract(self, pdf_path):
-        """Main extraction method with fallback"""
+    def extract(self, pdf_path, need_tables=None):
+        """Main extraction method: PyMuPDF first, pdfplumber when tables are needed"""
+        if need_tables is not None:
+            self.need_tables = need_tables
+        
         self.text_content = []
         self.tables = []
+        self.transaction_pages = []
+        self.used_pdfplumber = False
         
-        # Try pdfplumber first
-        success = self.extract_text_pdfplumber(pdf_path)
+        # Read the file once; both libraries parse the same in-memory bytes
+        with open(pdf_path, 'rb') as f:
+            pdf_bytes = f.read()
         
-        # Fallback to PyMuPDF if pdfplumber fails
-        if not success or not self.text_content:
-            print("Falling back to PyMuPDF...")
-            success = self.extract_text_pymupdf(pdf_path)
+        # PyMuPDF is much faster than pdfplumber, so try it first. Its table
+        # finder is slow and pdfplumber's tables replace its own, so skip it
+        # when pdfplumber will run anyway.
+        success = self.extract_text_pymupdf(pdf_bytes, find_tables=not self.need_tables)
+        
+        # Use pdfplumber if PyMuPDF failed or the caller asked for its tables
+        if self.need_tables or not success or not self.text_content:
+            # Only hand pdfplumber the pages PyMuPDF flagged as transaction pages.
+            # A failed PyMuPDF pass may have flagged only some of them.
+            if not success:
+                self.transaction_pages = []
+            success = self._extract_pdfplumber_pass(pdf_bytes, self.transaction_pages)
         
         if not success:
             raise Exception("Failed to extract PDF content")
         
+        return self._extracted_data()
+    
+    def extract_pdfplumber(self, pdf_path):
+        """Re-extract with pdfplumber after extract() found nothing usable
+        
+        Reuses the transaction pages found by the earlier PyMuPDF pass instead
+        of running PyMuPDF (and its table finder) over the PDF again.
+        """
+        self.need_tables = True
+        
+        with open(pdf_path, 'rb') as f:
+            pdf_bytes = f.read()
+        
+        if not self._extract_pdfplumber_pass(pdf_bytes, self.transaction_pages):
+            raise Exception("Failed to extract PDF content")
+        
+        return self._extracted_data()
+    
+    def _extract_pdfplumber_pass(self, pdf_bytes, pages):
+        """Replace the extracted text and tables with pdfplumber's"""
+        log.info("Extracting with pdfplumber...")
+        self.used_pdfplumber = True
+        self.text_content = []
+        self.tables = []
+        return self.extract_text_pdfplumber(pdf_bytes, pages=pages)
+    
+    def _extracted_data(self):
+        """Summary of the extracted content, as returned by extract()"""
+        # Joined text is built lazily by the `text` property when needed
+        self.__dict__.pop('text', None)
+        
         return {
-            'text': '\n'.join(self.text_content),
+            'text_pages': self.text_content,
+            'text_length': sum(len(page_text) for page_text in self.text_content),
             'tables': self.tables,
             'pages': len(self.text_content)
         }
     
+    @cached_property
+    def text(self):
+        """Full extracted text, joined on first access"""
+        return '\n'.join(self.text_content)
+    
+    def iter_text_lines(self):
+        """Lazily yield non-empty text lines, page by page"""
+        for page_text in self.text_content:
+            for raw_line in page_text.split('\n'):
+                line = raw_line.strip()
+                if line:
+                    yield line
+    
     def get_text_lines(self):
         """Get all text lines from extracted content"""
-        all_text = '\n'.join(self.text_content)
-        lines = [line.strip() for line in all_text.split('\n') if line.strip()]
-        return lines
+        # Split each page separately instead of joining everything into one string
+        return [line for page_text in self.text_content
+                for raw_line in page_text.split('\n')
+                if (line := raw_line.strip())]
     
     def extract_from_tables(self):
         """Extract structured data from tables if available.
@@ -87,6 +266,12 @@ class PDFExtractor:
         # Store headers - but reset per table if that table has its own headers
         known_headers = None
         
+        # Helper function to safely get column value
+        def safe_get(r, idx):
+            if idx is not None and idx < len(r):
+                return r[idx]
+            return None
+        
         for table in self.tables:
             if not table or len(table) < 1:
                 continue
@@ -99,7 +284,7 @@ class PDFExtractor:
             header_matches = sum(1 for p in header_patterns if p in first_row_text)
             
             # Also check if first row contains dates (DD/MM/YY format) - indicates data, not headers
-            has_date_pattern = bool(__import__('re').search(r'\d{2}[-/]\d{2}[-/]\d{2,4}', first_row_text))
+            has_date_pattern = bool(DATE_CELL_PATTERN.search(first_row_text))
             
             if header_matches >= 3 and not has_date_pattern:
                 # This is a header row - extract headers from THIS table
@@ -124,11 +309,28 @@ class PDFExtractor:
                         # Try to identify key columns
                         for i, cell in enumerate(first_row):
                             cell_text = str(cell).lower() if cell else ''
-                            if __import__('re').search(r'\d{2}[-/]\d{2}[-/]\d{2,4}', cell_text):
+                            if DATE_CELL_PATTERN.search(cell_text):
                                 known_headers[i] = 'date'
                 
                 data_rows = table  # ALL rows are data
             
+            # Column positions depend only on this table's headers - compute them once per table
+            header_index = [(i, h) for i, h in enumerate(known_headers) if h]
+            withdrawal_idx = None
+            deposit_idx = None
+            narration_idx = None
+            balance_idx = None
+            
+            for i, h in enumerate(known_headers):
+                if 'withdrawal' in h or h in ['dr', 'dr.']:
+                    withdrawal_idx = i
+                elif 'deposit' in h or h in ['cr', 'cr.']:
+                    deposit_idx = i
+                elif 'narration' in h or 'description' in h or 'particulars' in h:
+                    narration_idx = i
+                elif 'balance' in h or 'closing' in h:
+                    balance_idx = i
+            
             # Process data rows
             for row in data_rows:
                 if not row or all(not cell for cell in row):
@@ -143,28 +345,6 @@ class PDFExtractor:
                 
                 if len(date_lines) > 1:
                     # SMART ALIGNMENT: Get all non-empty amounts and match them with dates
-                    # Find column indices for amounts and other data
-                    withdrawal_idx = None
-                    deposit_idx = None
-                    narration_idx = None
-                    balance_idx = None
-                    
-                    for i, h in enumerate(known_headers):
-                        if 'withdrawal' in h or h in ['dr', 'dr.']:
-                            withdrawal_idx = i
-                        elif 'deposit' in h or h in ['cr', 'cr.']:
-                            deposit_idx = i
-                        elif 'narration' in h or 'description' in h or 'particulars' in h:
-                            narration_idx = i
-                        elif 'balance' in h or 'closing' in h:
-                            balance_idx = i
-                    
-                    # Helper function to safely get column value
-                    def safe_get(r, idx):
-                        if idx is not None and idx < len(r):
-                            return r[idx]
-                        return None
-                    
                     # Extract all non-empty amounts with their types
                     withdrawals = []
                     deposits = []
@@ -243,13 +423,12 @@ class PDFExtractor:
                             structured_data.append(row_data)
                 else:
                     # Normal single-line row
-                    row_data = {}
-                    for i, cell in enumerate(row):
-                        if i < len(known_headers) and known_headers[i]:
-                            row_data[known_headers[i]] = str(cell).strip() if cell else ''
+                    row_len = len(row)
+                    row_data = {h: (str(row[i]).strip() if row[i] else '')
+                                for i, h in header_index if i < row_len}
                     
                     if row_data:
                         structured_data.append(row_data)
         
-        print(f"[DEBUG] Extracted {len(structured_data)} rows from tables")
+        log.debug(f"Extracted {len(structured_data)} rows from tables")
         return structured_data
\ No newline at end of file
@@ -1,40 +1,247 @@
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-# Removing spaCy dependency
-# import spacy
-from dateutil import parser as date_parser
+from functools import lru_cache, partial
+from itertools import repeat
+from typing import Optional
 import hashlib
+import logging
+
+from services.parserHot import clean_amount, determine_transaction_type, extract_date, strip_trailing_balance
+
+try:
+    import re2  # google-re2
+except ImportError:
+    re2 = None
+
+log = logging.getLogger(__name__)
+
+
+# Lines at least this long are matched with RE2 when it is installed
+RE2_MIN_LINE_LENGTH = 1000
+
+# Characters that re and RE2 treat differently even with re.ASCII, mapped to
+# their plain equivalents: whitespace outside RE2's \s (the no-break space is
+# common in PDF text), and the two letters RE2's case folding maps onto ASCII
+_LINE_TRANSLATION = str.maketrans({
+    **dict.fromkeys('\v\x1c\x1d\x1e\x1f\x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005'
+                    '\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000', ' '),
+    '\u017f': 's',  # long s
+    '\u212a': 'K',  # Kelvin sign
+})
+
+
+def _normalize_line(text):
+    """Map characters the two regex engines disagree on to plain ASCII (length is unchanged)"""
+    if text.isascii() and '\v' not in text:
+        return text
+    return text.translate(_LINE_TRANSLATION)
+
+
+class _LinePattern:
+    """A pattern scanned over whole statement lines
+    
+    Matches with re, or with RE2 (when installed) once a line reaches
+    RE2_MIN_LINE_LENGTH characters. RE2 runs in linear time, while backtracking
+    on a long run such as "1,1,1,...,1" is quadratic - a 40k character line takes
+    about a minute with re. RE2's Python binding costs more per call, so normal
+    lines stay on re. RE2 has no flags argument and no lookarounds, so patterns
+    use an inline (?i:...) group and avoid lookaheads.
+    
+    RE2's digit, whitespace and word-boundary classes are ASCII-only, so re is
+    compiled with re.ASCII to match. Text passed through _normalize_line gets
+    the same matches from either engine, whatever its length.
+    """
+    __slots__ = ('pattern', 'groupindex', '_re', '_re2')
+    
+    def __init__(self, pattern):
+        pattern = f'(?i:{pattern})'
+        self.pattern = pattern
+        self._re = re.compile(pattern, re.ASCII)
+        self._re2 = re2.compile(pattern) if re2 is not None else None
+        self.groupindex = self._re.groupindex
+    
+    def _engine(self, text):
+        if self._re2 is not None and len(text) >= RE2_MIN_LINE_LENGTH:
+            return self._re2
+        return self._re
+    
+    def search(self, text, pos=0):
+        return self._engine(text).search(text, pos)
+    
+    def finditer(self, text, pos=0):
+        return self._engine(text).finditer(text, pos)
+    
+    def fullmatch(self, text):
+        return self._engine(text).fullmatch(text)
+    
+    def sub(self, repl, text):
+        return self._engine(text).sub(repl, text)
+
+
+@dataclass(slots=True)
+class Transaction:
+    """A single parsed transaction. Field names match the JSON/MongoDB schema."""
+    id: str
+    userId: str
+    date: str
+    description: str
+    amount: float
+    type: str
+    category: str = 'Other'
+    balance: Optional[float] = None
+    raw_line: Optional[str] = None
+
 
 class TransactionParser:
-    def __init__(self):
-        # Removed spaCy dependency
-        self.nlp = None
-        print("Using simplified text processing without spaCy")
+    # Same-header table runs shorter than this are parsed row by row. Importing
+    # pandas takes ~0.25s, which the column-wise path only wins back at around
+    # 130k rows when the process has not imported pandas yet
+    TABLE_DF_MIN_ROWS = 150000
+    
+    # Each text-parsing worker process gets at least this many blocks; below it
+    # process startup and pickling cost more than the parallel extraction saves
+    PARALLEL_MIN_BLOCKS_PER_WORKER = 1000
+    
+    # Header words and labels that _parse_date rejects outright
+    _NON_DATE_PREFIXES = ('date', 'narration', 'balance', 'withdrawal', 'deposit',
+                          'credit', 'debit', 'description', 'particulars', 'amount',
+                          'opening', 'closing', 'account', 'savings', 'current', 'generated')
+    
+    # Candidate column names for table rows, in lookup order
+    _DATE_KEYS = ('date', 'post date', 'transaction date', 'txn date', 'value date', 'value dt', 'posting date')
+    _DESCRIPTION_KEYS = ('description', 'particulars', 'narration', 'details', 'remarks', 'transaction details')
+    _DEBIT_KEYS = ('debit', 'withdrawal', 'withdrawal amt', 'withdrawal amt.', 'debit amount', 'dr', 'dr.', 'paid out', 'money out')
+    _CREDIT_KEYS = ('credit', 'deposit', 'deposit amt', 'deposit amt.', 'credit amount', 'cr', 'cr.', 'paid in', 'money in')
+    _AMOUNT_KEYS = ('amount', 'txn amount', 'transaction amount')
+    _BALANCE_KEYS = ('balance', 'closing balance', 'available balance', 'running balance')
+    
+    def __init__(self, keep_raw_line=False):
+        # raw_line (the block's text) is only for debugging; leaving it out
+        # saves holding up to 200 characters per transaction
+        self.keep_raw_line = keep_raw_line
         
         # Common transaction keywords
         self.debit_keywords = ['debit', 'withdrawal', 'payment', 'paid', 'purchase', 'transfer to', 'atm', 'dr', 'dr.']
         self.credit_keywords = ['credit', 'deposit', 'received', 'transfer from', 'salary', 'refund', 'by ', 'rev', 'interest']
+        self.header_keywords = ['date', 'description', 'debit', 'credit', 'balance', 'transaction', 'particulars']
         
-        # Date patterns
-        self.date_patterns = [
-            r'\b\d{2}[-/]\d{2}[-/]\d{4}\b',  # DD-MM-YYYY or DD/MM/YYYY
-            r'\b\d{2}[-/]\d{2}[-/]\d{2}\b',   # DD-MM-YY or DD/MM/YY
-            r'\b\d{4}[-/]\d{2}[-/]\d{2}\b',   # YYYY-MM-DD
-            r'\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4}\b'  # DD Mon YYYY
+        # Keyword lists as single alternations (plain substring matches, run on lowercased text)
+        self._debit_re = self._keyword_re(self.debit_keywords)
+        self._credit_re = self._keyword_re(self.credit_keywords)
+        self._header_re = self._keyword_re(self.header_keywords)
+        
+        # Date patterns (compiled once - they run on every line), each paired
+        # with the strptime formats that can parse what it matches
+        date_formats = [
+            (r'\b\d{2}[-/]\d{2}[-/]\d{4}\b', ('%d/%m/%Y', '%d-%m-%Y')),  # DD-MM-YYYY or DD/MM/YYYY
+            (r'\b\d{2}[-/]\d{2}[-/]\d{2}\b', ('%d/%m/%y', '%d-%m-%y')),   # DD-MM-YY or DD/MM/YY
+            (r'\b\d{4}[-/]\d{2}[-/]\d{2}\b', ('%Y-%m-%d', '%Y/%m/%d')),   # YYYY-MM-DD
+            (r'\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4}\b',
+             ('%d %b %Y', '%d %B %Y', '%d %b %y', '%d %B %y')),  # DD Mon YYYY
         ]
+        self.date_patterns = [_LinePattern(p) for p, _ in date_formats]
+        self._date_formats = {f'd{i}': formats for i, (_, formats) in enumerate(date_formats)}
         
         # Amount patterns
-        self.amount_patterns = [
+        self.amount_patterns = [_LinePattern(p) for p in [
             r'₹\s*[\d,]+\.?\d*',  # ₹1,234.56
             r'Rs\.?\s*[\d,]+\.?\d*',  # Rs.1234.56
             r'\b[\d,]+\.\d{2}\b',  # 1234.56
-            r'\b[\d,]+\b(?=\s*(?:Dr|Cr|debit|credit))',  # Amount before Dr/Cr
-        ]
+            r'\b(?P<drcr>[\d,]+)\b\s*(?:Dr|Cr|debit|credit)',  # Amount before Dr/Cr (the amount is the drcr group)
+        ]]
+        
+        # Each group merged into one alternation: a single scan per line instead of one per pattern
+        # Named groups (d0, d1, ...) tell _parse_date which strptime formats apply
+        self._date_re = _LinePattern(
+            '|'.join(f'(?P<d{i}>{p.pattern})' for i, p in enumerate(self.date_patterns))
+        )
+        self._amount_re = self._combine(self.amount_patterns)
+        self._amount_drcr_group = self._amount_re.groupindex['drcr']
+        
+        # Helper patterns
+        self._balance_re = _LinePattern(r'balance[:\s]*₹?\s*[\d,]+\.?\d*')
+        self._drcr_re = _LinePattern(r'\b(Dr|Cr|debit|credit)\b')
+        self._currency_strip_re = re.compile(r'[₹Rs\s]')
+        self._non_numeric_re = re.compile(r'[^\d.]')
+        
+        # Everything _extract_description strips out, removed in one pass
+        self._noise_re = self._combine(self.date_patterns + self.amount_patterns + [self._drcr_re])
+        self._noise_drcr_group = self._noise_re.groupindex['drcr']
+    
+        # Statements repeat the same dates and amounts on many rows - memoize the parsers
+        self._parse_date = lru_cache(maxsize=4096)(self._parse_date_impl)
+        self._clean_amount = lru_cache(maxsize=4096)(partial(
+            clean_amount, currency_strip_re=self._currency_strip_re, non_numeric_re=self._non_numeric_re
+        ))
+        
+        # Per-line helpers live in parserHot (mypyc-compilable); bind this parser's patterns
+        self._extract_date = partial(
+            extract_date, date_re=self._date_re, date_patterns=self.date_patterns, parse_date=self._parse_date
+        )
+        self._determine_transaction_type = partial(
+            determine_transaction_type, debit_re=self._debit_re, credit_re=self._credit_re
+        )
+    
+    @staticmethod
+    def _keyword_re(keywords):
+        """Compile a keyword list into one substring alternation"""
+        return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+    
+    @staticmethod
+    def _combine(patterns):
+        """Merge compiled patterns into a single case-insensitive alternation"""
+        return _LinePattern('|'.join(f'(?:{p.pattern})' for p in patterns))
+    
+    @staticmethod
+    def _iter_spans(pattern, drcr_group, text):
+        """Yield (start, end) of each match, as finditer would
+        
+        A Dr/Cr-suffixed amount only spans its drcr group and scanning resumes
+        right after it, like the lookahead this group replaces.
+        """
+        # Most amounts have decimals and never take the drcr branch, so run
+        # finditer and only restart it after a drcr match
+        pos = 0
+        while True:
+            for match in pattern.finditer(text, pos):
+                if match.group(drcr_group) is not None:
+                    start, pos = match.span(drcr_group)
+                    yield start, pos
+                    break
+                yield match.span()
+            else:
+                return
     
     def parse_transactions_from_text(self, text_lines, user_id):
         """Parse transactions from text lines using NLP and pattern matching"""
-        transactions = []
+        return self._extract_blocks(self._group_blocks(text_lines), user_id)
+    
+    def parse_transactions_from_text_parallel(self, text_lines, user_id, workers=None):
+        """Parse transactions from text lines, extracting blocks in worker processes
         
+        Grouping lines into blocks is sequential (a block runs until the next dated
+        line), so only block extraction is split across processes. Each worker
+        gets at least PARALLEL_MIN_BLOCKS_PER_WORKER blocks, so statements with
+        fewer than twice that many are parsed in this process.
+        """
+        transaction_blocks = self._group_blocks(text_lines)
+        workers = min(workers or os.cpu_count() or 1, len(transaction_blocks) // self.PARALLEL_MIN_BLOCKS_PER_WORKER)
+        if workers < 2:
+            return self._extract_blocks(transaction_blocks, user_id)
+        
+        # Contiguous chunks keep the transactions in statement order
+        chunk_size = -(-len(transaction_blocks) // workers)
+        chunks = [transaction_blocks[i:i + chunk_size] for i in range(0, len(transaction_blocks), chunk_size)]
+        
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            results = executor.map(_extract_block_chunk, chunks, repeat(user_id), repeat(self.keep_raw_line))
+            return [transaction for chunk in results for transaction in chunk]
+    
+    def _group_blocks(self, text_lines):
+        """Group text lines into transaction blocks, each starting at a dated line"""
         # Prepare a list of transaction blocks
         transaction_blocks = []
         current_block = []
@@ -42,7 +249,10 @@ class TransactionParser:
         for line in text_lines:
             if not line.strip(): 
                 continue
-            if self._is_header_line(line):
+            # Short blocks are matched with re and long ones with RE2, so map
+            # the characters the two disagree on before either sees the line
+            line = _normalize_line(line)
+            if self._is_header_line(line.lower()):
                 continue
                 
             # Check if this line starts a new transaction (has a Date)
@@ -62,21 +272,21 @@ class TransactionParser:
         # Add the last block
         if current_block:
             transaction_blocks.append(current_block)
-            
-        # Process each block
+        
+        return transaction_blocks
+    
+    def _extract_blocks(self, transaction_blocks, user_id):
+        """Extract a transaction from each block, skipping blocks that don't parse"""
+        transactions = []
+        
         for block in transaction_blocks:
-            # Combine block lines into one text for context
-            full_text = " ".join(block)
-            
-            # Use the first line for primary date extraction (though we already know it has a date)
-            # Use the FULL text for Amount and Description extraction
+            # The block's first line holds the date; amount and description
+            # come from the block's full text
             transaction = self._extract_transaction_from_block(block, user_id)
             if transaction:
                 transactions.append(transaction)
                 
         return transactions
-        
-        return transactions
     
     def parse_transactions_from_table(self, table_data, user_id):
         """Parse transactions from structured table data"""
@@ -112,33 +322,171 @@ class TransactionParser:
                     if len(failed_samples) < 10:
                         failed_samples.append(row)
         
-        print(f"\n[DEBUG] Transaction parsing stats:")
-        print(f"  Total rows received: {total_rows}")
-        print(f"  Successfully parsed: {success_count}")
-        print(f"  Skipped - no date: {no_date_count}")
-        print(f"  Skipped - no amount: {no_amount_count}")
+        log.debug("Transaction parsing stats:")
+        log.debug(f"  Total rows received: {total_rows}")
+        log.debug(f"  Successfully parsed: {success_count}")
+        log.debug(f"  Skipped - no date: {no_date_count}")
+        log.debug(f"  Skipped - no amount: {no_amount_count}")
         
         if failed_samples:
-            print(f"\n[DEBUG] Sample failed rows:")
+            log.debug("Sample failed rows:")
             for idx, row in enumerate(failed_samples):
-                print(f"  Failed {idx}: {row}")
+                log.debug(f"  Failed {idx}: {row}")
         
         # Debug: Check for high value debits to find the 40k discrepancy
-        print("\n[DEBUG] High Value Debits (> 10000):")
-        debit_sum = 0
-        for t in transactions:
-            if t['type'] == 'Debit':
-                debit_sum += t['amount']
-                if t['amount'] > 10000:
-                    print(f"  Dr {t['amount']}: {t['date']} - {t['description'][:30]}")
-        print(f"[DEBUG] Calculated Total Debit: {debit_sum}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("High Value Debits (> 10000):")
+            debit_sum = 0
+            for t in transactions:
+                if t.type == 'Debit':
+                    debit_sum += t.amount
+                    if t.amount > 10000:
+                        log.debug(f"  Dr {t.amount}: {t.date} - {t.description[:30]}")
+            log.debug(f"Calculated Total Debit: {debit_sum}")
         
         return transactions
     
+    def parse_transactions_from_table_df(self, table_data, user_id):
+        """Parse table rows column-at-a-time with pandas
+        
+        Gives the same transactions as parse_transactions_from_table. Rows are
+        processed in runs sharing the same headers (one run per table); small
+        runs and runs pandas cannot handle go through the row-by-row parser.
+        Only worth it for very large tables, or where pandas is already imported
+        and TABLE_DF_MIN_ROWS can be lowered (about 5000 rows).
+        """
+        if len(table_data) < self.TABLE_DF_MIN_ROWS:
+            return self.parse_transactions_from_table(table_data, user_id)
+        
+        try:
+            # Imported lazily - pandas is slow to import and only needed for tables
+            import pandas as pd
+        except ImportError:
+            return self.parse_transactions_from_table(table_data, user_id)
+        
+        transactions = []
+        start = 0
+        while start < len(table_data):
+            keys = tuple(table_data[start])
+            end = start + 1
+            while end < len(table_data) and tuple(table_data[end]) == keys:
+                end += 1
+            rows = table_data[start:end]
+            start = end
+            
+            columns = [k.lower().strip() for k in keys]
+            if len(rows) < self.TABLE_DF_MIN_ROWS or len(set(columns)) != len(columns):
+                transactions.extend(self.parse_transactions_from_table(rows, user_id))
+                continue
+            
+            try:
+                transactions.extend(self._parse_table_frame(pd, rows, columns, user_id))
+            except Exception as e:
+                log.warning(f"Vectorized table parsing failed, parsing rows one by one: {e}")
+                transactions.extend(self.parse_transactions_from_table(rows, user_id))
+        
+        log.debug(f"Table rows: {len(table_data)}, transactions: {len(transactions)}")
+        return transactions
+    
+    def _parse_table_frame(self, pd, rows, columns, user_id):
+        """Parse one run of same-header table rows as a DataFrame"""
+        df = pd.DataFrame.from_records([tuple(row.values()) for row in rows], columns=columns)
+        # Empty cells never match, same as in _find_value
+        df = df.where(df.astype(bool))
+        
+        def first_value(keys_to_check):
+            # Same lookup order as _find_value: direct match, then partial matches
+            ordered = []
+            for k in keys_to_check:
+                if k in columns:
+                    ordered.append(k)
+                ordered.extend(c for c in columns if k in c or c in k)
+            if not ordered:
+                return pd.Series(None, index=df.index, dtype=object)
+            # Column by column - a row-wise bfill transposes the frame and is far slower
+            values = df[ordered[0]]
+            for column in dict.fromkeys(ordered[1:]):
+                values = values.where(values.notna(), df[column])
+            return values
+        
+        # Dates: parse each distinct value once
+        date_field = first_value(self._DATE_KEYS)
+        parsed = {value: self._parse_date(value) for value in date_field.dropna().unique()}
+        dates = date_field.map(parsed)
+        
+        descriptions = first_value(self._DESCRIPTION_KEYS).fillna('')
+        
+        # Debit column first; negative debits are reversals (Credit)
+        debit = self._clean_amount_series(first_value(self._DEBIT_KEYS))
+        amounts = debit.abs().fillna(0)
+        types = pd.Series('Debit', index=df.index).mask(debit < 0, 'Credit')
+        
+        # Then Credit/Deposit; negative credits are reversals (Debit)
+        credit = self._clean_amount_series(first_value(self._CREDIT_KEYS))
+        use_credit = (amounts == 0) & credit.notna()
+        amounts = amounts.mask(use_credit, credit.abs())
+        types = types.mask(use_credit, pd.Series('Credit', index=df.index).mask(credit < 0, 'Debit'))
+        
+        # Then a generic amount column, typed from the description
+        generic = self._clean_amount_series(first_value(self._AMOUNT_KEYS))
+        use_generic = (amounts == 0) & generic.notna()
+        amounts = amounts.mask(use_generic, generic)
+        
+        balances = self._clean_amount_series(first_value(self._BALANCE_KEYS))
+        
+        keep = dates.notna() & (amounts != 0)
+        transactions = []
+        for date, description, amount, trans_type, balance, generic_type in zip(
+            dates[keep].tolist(),
+            descriptions[keep].tolist(),
+            amounts[keep].astype(float).tolist(),
+            types[keep].tolist(),
+            balances[keep].tolist(),
+            use_generic[keep].tolist(),
+        ):
+            if generic_type:
+                trans_type = self._determine_transaction_type(description.lower(), None)
+            if balance != balance:  # NaN - no balance column value
+                balance = None
+            
+            transactions.append(Transaction(
+                id=self._generate_transaction_id(user_id, date, amount, description, balance),
+                userId=user_id,
+                date=date,
+                description=description,
+                amount=amount,
+                type=trans_type,
+                category=self._categorize_transaction(description, trans_type),
+                balance=balance
+            ))
+        
+        return transactions
+    
+    def _clean_amount_series(self, values):
+        """Vectorized _clean_amount; missing values stay NaN"""
+        present = values.dropna().astype(str)
+        
+        # Reversal sign, checked only where a minus sign appears (as in _clean_amount)
+        stripped = present[present.str.contains('-', regex=False)].str.replace(r'[₹Rs\s]', '', regex=True)
+        negative = (
+            stripped.str.startswith('-') | stripped.str.contains('(-', regex=False) | stripped.str.endswith('-')
+        ).reindex(present.index, fill_value=False)
+        
+        # Keep digits and the last decimal point only
+        cleaned = present.str.replace(r'[^\d.]', '', regex=True).str.replace(r'\.(?=.*\.)', '', regex=True)
+        valid = cleaned.str.contains(r'\d')
+        amounts = cleaned.where(valid, '0').astype(float)
+        amounts = amounts.mask(negative, -amounts)
+        # Unparseable values clean to 0.0 (never -0.0), like _clean_amount
+        amounts = amounts.mask(~valid, 0.0)
+        
+        return amounts.reindex(values.index)
+    
     def _extract_transaction_from_block(self, block, user_id):
         """Extract transaction details from a block of lines"""
         try:
             full_text = " ".join(block)
+            full_text_lower = full_text.lower()  # lowercased once for amount and type checks
             first_line = block[0]
             
             # Extract date (from first line usually)
@@ -152,7 +500,7 @@ class TransactionParser:
             
             # Extract amount from FULL text
             # We prioritize explicit amount columns if they were somehow preserved, but here we just regex the blob
-            amount_info = self._extract_amount(full_text)
+            amount_info = self._extract_amount(full_text, full_text_lower)
             if not amount_info:
                 return None
             
@@ -160,10 +508,10 @@ class TransactionParser:
             description = self._extract_description(full_text)
             
             # Determine transaction type using FULL text context
-            trans_type = self._determine_transaction_type(full_text, amount_info['type'])
+            trans_type = self._determine_transaction_type(full_text_lower, amount_info['type'])
             
             # Extract balance
-            balance = self._extract_balance(full_text)
+            balance = self._extract_balance(full_text, full_text_lower)
             
             # Generate unique ID
             transaction_id = self._generate_transaction_id(user_id, date, amount_info['amount'], description, balance)
@@ -171,45 +519,47 @@ class TransactionParser:
             # Determine category
             category = self._categorize_transaction(description, trans_type)
             
-            return {
-                'id': transaction_id,
-                'userId': user_id,
-                'date': date,
-                'description': description, # Truncate description further if needed
-                'amount': amount_info['amount'],
-                'type': trans_type,
-                'category': category,
-                'balance': balance,
-                'raw_line': full_text[:200]
-            }
+            return Transaction(
+                id=transaction_id,
+                userId=user_id,
+                date=date,
+                description=description, # Truncate description further if needed
+                amount=amount_info['amount'],
+                type=trans_type,
+                category=category,
+                balance=balance,
+                raw_line=full_text[:200] if self.keep_raw_line else None
+            )
         except Exception as e:
-            print(f"Error parsing block: {e}")
+            log.warning(f"Error parsing block: {e}")
             return None        
 
     def _extract_transaction_from_line(self, line, user_id, index):
         # Wraps block parser for single line
         return self._extract_transaction_from_block([line], user_id)
     
+    @staticmethod
+    def _find_value(normalized_row, keys_to_check):
+        """Flexible column lookup on a lowercased row with empty cells removed"""
+        for k in keys_to_check:
+            # Direct match
+            value = normalized_row.get(k)
+            if value:
+                return value
+            # Partial match (key contains or is contained by)
+            for row_key, row_val in normalized_row.items():
+                if k in row_key or row_key in k:
+                    return row_val
+        return None
+    
     def _extract_transaction_from_dict(self, row_dict, user_id, index):
         """Extract transaction from dictionary (table row)"""
         try:
-            # Normalize all keys to lowercase for matching
-            normalized_row = {k.lower().strip(): v for k, v in row_dict.items()}
-            
-            # Helper function for flexible key matching
-            def find_value(keys_to_check):
-                for k in keys_to_check:
-                    # Direct match
-                    if k in normalized_row and normalized_row[k]:
-                        return normalized_row[k]
-                    # Partial match (key contains or is contained by)
-                    for row_key, row_val in normalized_row.items():
-                        if row_val and (k in row_key or row_key in k):
-                            return row_val
-                return None
+            # Normalize keys to lowercase once; empty cells can never match, so drop them here
+            normalized_row = {k.lower().strip(): v for k, v in row_dict.items() if v}
             
             # Try to find date field
-            date_field = find_value(['date', 'post date', 'transaction date', 'txn date', 'value date', 'value dt', 'posting date'])
+            date_field = self._find_value(normalized_row, self._DATE_KEYS)
             
             if not date_field:
                 return None
@@ -219,15 +569,14 @@ class TransactionParser:
                 return None
             
             # Find description
-            description = find_value(['description', 'particulars', 'narration', 'details', 'remarks', 'transaction details']) or ''
+            description = self._find_value(normalized_row, self._DESCRIPTION_KEYS) or ''
             
             # Find amount - Now with FLEXIBLE matching for column names
             amount = 0
             trans_type = 'Debit'
             
             # Check for Debit/Withdrawal columns (flexible matching)
-            debit_keys = ['debit', 'withdrawal', 'withdrawal amt', 'withdrawal amt.', 'debit amount', 'dr', 'dr.', 'paid out', 'money out']
-            debit_val = find_value(debit_keys)
+            debit_val = self._find_value(normalized_row, self._DEBIT_KEYS)
             if debit_val:
                 amount = self._clean_amount(debit_val)
                 # Handle reversals: negative amount in debit column = Credit (money returned)
@@ -239,8 +588,7 @@ class TransactionParser:
             
             # If no debit, check Credit/Deposit columns
             if amount == 0:
-                credit_keys = ['credit', 'deposit', 'deposit amt', 'deposit amt.', 'credit amount', 'cr', 'cr.', 'paid in', 'money in']
-                credit_val = find_value(credit_keys)
+                credit_val = self._find_value(normalized_row, self._CREDIT_KEYS)
                 if credit_val:
                     amount = self._clean_amount(credit_val)
                     # Handle reversals: negative amount in credit column = Debit (money taken back)
@@ -252,17 +600,17 @@ class TransactionParser:
             
             # If still no amount, try generic 'amount' column and determine type from description
             if amount == 0:
-                amount_val = find_value(['amount', 'txn amount', 'transaction amount'])
+                amount_val = self._find_value(normalized_row, self._AMOUNT_KEYS)
                 if amount_val:
                     amount = self._clean_amount(amount_val)
-                    trans_type = self._determine_transaction_type(description, None)
+                    trans_type = self._determine_transaction_type(description.lower(), None)
             
             if amount == 0:
                 return None
             
             # Find balance
             balance = None
-            balance_val = find_value(['balance', 'closing balance', 'available balance', 'running balance'])
+            balance_val = self._find_value(normalized_row, self._BALANCE_KEYS)
             if balance_val:
                 balance = self._clean_amount(balance_val)
             
@@ -272,54 +620,53 @@ class TransactionParser:
             # Determine category
             category = self._categorize_transaction(description, trans_type)
             
-            return {
-                'id': transaction_id,
-                'userId': user_id,
-                'date': date,
-                'description': description,
-                'amount': amount,
-                'type': trans_type,
-                'category': category,
-                'balance': balance
-            }
+            return Transaction(
+                id=transaction_id,
+                userId=user_id,
+                date=date,
+                description=description,
+                amount=amount,
+                type=trans_type,
+                category=category,
+                balance=balance
+            )
         except Exception as e:
-            print(f"Error parsing row: {e}")
+            log.warning(f"Error parsing row: {e}")
             return None
     
-    def _extract_date(self, text):
-        """Extract date from text"""
-        for pattern in self.date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return self._parse_date(match.group())
-        return None
-    
-    def _parse_date(self, date_str):
-        """Parse date string to ISO format"""
+    def _parse_date_impl(self, date_str):
+        """Parse date string to ISO format (memoized as _parse_date)"""
         try:
             # Reject obvious non-date strings
             date_str_lower = str(date_str).lower().strip()
-            reject_patterns = ['date', 'narration', 'balance', 'withdrawal', 'deposit', 
-                             'credit', 'debit', 'description', 'particulars', 'amount',
-                             'opening', 'closing', 'account', 'savings', 'current', 'generated']
-            
-            # Check if it's obviously not a date
-            for pattern in reject_patterns:
-                if date_str_lower.startswith(pattern) or date_str_lower == pattern:
-                    return None
+            if date_str_lower.startswith(self._NON_DATE_PREFIXES):
+                return None
             
             # Must contain at least one digit to be a date
             if not any(c.isdigit() for c in date_str):
                 return None
             
-            # Try multiple date formats
+            # Fast path: if the string is exactly one of the known patterns,
+            # parse it with that pattern's strptime formats
+            candidate = _normalize_line(str(date_str).strip())
+            match = self._date_re.fullmatch(candidate)
+            if match:
+                for fmt in self._date_formats[match.lastgroup]:
+                    try:
+                        return datetime.strptime(candidate, fmt).strftime('%Y-%m-%d')
+                    except ValueError:
+                        continue
+            
+            # Fall back to dateutil for anything else. Imported here: it is only
+            # needed for unusual formats and costs ~25ms to import.
+            from dateutil import parser as date_parser
             dt = date_parser.parse(date_str, dayfirst=True)
             return dt.strftime('%Y-%m-%d')
         except:
             return None
     
-    def _extract_amount(self, text):
-        """Extract amount and type from text"""
+    def _extract_amount(self, text, text_lower):
+        """Extract amount and type from text (text_lower is text.lower())"""
         
         # First, try to extract non-balance amounts (amounts NOT followed by Cr/Dr)
         # This prevents picking up balance column values as transaction amounts
@@ -328,21 +675,19 @@ class TransactionParser:
         non_balance_amounts = []
         balance_amounts = []
         
-        for pattern in self.amount_patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                amount_str = match.group()
-                amount_val = self._clean_amount(amount_str)
+        for start, end_pos in self._iter_spans(self._amount_re, self._amount_drcr_group, text):
+            amount_str = text[start:end_pos]
+            amount_val = self._clean_amount(amount_str)
+            
+            if amount_val > 0:
+                # Check what follows this amount
+                following_text = text[end_pos:end_pos + 10].strip().lower()
                 
-                if amount_val > 0:
-                    # Check what follows this amount
-                    end_pos = match.end()
-                    following_text = text[end_pos:end_pos + 10].strip().lower()
-                    
-                    # If followed by Cr or Dr, it's a balance amount
-                    if following_text.startswith('cr') or following_text.startswith('dr'):
-                        balance_amounts.append((amount_val, 'Balance', match.start()))
-                    else:
-                        non_balance_amounts.append((amount_val, amount_str, match.start()))
+                # If followed by Cr or Dr, it's a balance amount
+                if following_text.startswith('cr') or following_text.startswith('dr'):
+                    balance_amounts.append((amount_val, 'Balance', start))
+                else:
+                    non_balance_amounts.append((amount_val, amount_str, start))
         
         # Prefer non-balance amounts (actual transaction amounts)
         if non_balance_amounts:
@@ -358,10 +703,8 @@ class TransactionParser:
             return None
         
         # Determine transaction type from context
-        text_lower = text.lower()
-        
         # Remove any balance parts from classification
-        text_without_balance = re.sub(r'[\d,]+\.?\d*\s*(cr|dr)\.?\s*$', '', text_lower)
+        text_without_balance = strip_trailing_balance(text_lower)
         
         if 'dr' in text_without_balance or 'debit' in text_without_balance:
             trans_type = 'Debit'
@@ -372,83 +715,21 @@ class TransactionParser:
             
         return {'amount': amount, 'type': trans_type}
     
-    def _clean_amount(self, amount_str):
-        """Clean and convert amount string to float"""
-        try:
-            # Remove currency symbols and spaces
-            cleaned = re.sub(r'[₹Rs\s]', '', str(amount_str))
-            
-            # Check if this is a negative amount (reversal)
-            is_negative = cleaned.startswith('-') or '(-' in cleaned or cleaned.endswith('-')
-            
-            # Remove commas (assuming standard comma separation for thousands/lakhs)
-            cleaned = cleaned.replace(',', '')
-            
-            # Keep only digits and decimal point
-            cleaned = re.sub(r'[^\d.]', '', cleaned)
-            
-            # Check for multiple dots and handle them (keep only the last one if multiple)
-            if cleaned.count('.') > 1:
-                parts = cleaned.split('.')
-                cleaned = ''.join(parts[:-1]) + '.' + parts[-1]
-            
-            amount = float(cleaned) if cleaned else 0
-            
-            # Apply negative sign for reversals
-            if is_negative:
-                amount = -amount
-            
-            return amount
-        except:
-            return 0
-    
     def _extract_description(self, text):
         """Extract transaction description"""
-        # Remove date and amount patterns
-        desc = text
-        for pattern in self.date_patterns + self.amount_patterns:
-            desc = re.sub(pattern, '', desc, flags=re.IGNORECASE)
-        
-        # Remove common noise words
-        desc = re.sub(r'\b(Dr|Cr|debit|credit)\b', '', desc, flags=re.IGNORECASE)
-        desc = re.sub(r'\s+', ' ', desc).strip()
+        # Remove dates, amounts and Dr/Cr noise words in one pass by joining the
+        # text between their spans
+        pieces = []
+        pos = 0
+        for start, end in self._iter_spans(self._noise_re, self._noise_drcr_group, text):
+            pieces.append(text[pos:start])
+            pos = end
+        pieces.append(text[pos:])
+        # Collapse whitespace with split/join (same whitespace set as \s+, no regex pass)
+        desc = ' '.join(''.join(pieces).split())
         
         return desc[:200] if desc else 'Transaction'
     
-    def _determine_transaction_type(self, text, hint_type):
-        """Determine if transaction is debit or credit"""
-        text_lower = text.lower()
-        
-        # Check for explicit indicators in the FULL text (careful about "Cr" at end)
-        
-        # Remove the Balance part (last amount + Cr) to avoid false positive
-        clean_text_lower = re.sub(r'[\d,]+\.?\d*\s*(cr|dr)\.?\s*$', '', text_lower)
-        
-        # 1. Start-of-line heuristics (Strongest)
-        if clean_text_lower.startswith('by ') or 'credit' in clean_text_lower or 'deposit' in clean_text_lower:
-             return 'Credit'
-        if clean_text_lower.startswith('to ') or 'debit' in clean_text_lower or 'withdrawal' in clean_text_lower:
-             return 'Debit'
-        
-        # 2. Check for explicit keywords
-        if any(keyword in clean_text_lower for keyword in self.debit_keywords):
-            return 'Debit'
-        
-        # For credit keywords, ensure we don't match "Cr" if it was removed or if it's just part of a word
-        # We already checked 'credit' and 'deposit' above.
-        for keyword in self.credit_keywords:
-            if keyword in clean_text_lower:
-                return 'Credit'
-        
-        # 3. Use hint from amount extraction
-        if hint_type:
-             return hint_type.title()
-             
-        # 4. Fallback Default
-        # For bank statements, ambiguity usually means Debit (spending/transfer out)
-        # UPI without "CREDIT" or "BY" is usually a payment.
-        return 'Debit'
-
     def _categorize_transaction(self, description, trans_type):
         """Categorize transaction based on description and type"""
         desc = description.lower()
@@ -476,27 +757,43 @@ class TransactionParser:
         
         return 'General'
     
-    def _extract_balance(self, text):
-        """Extract balance from text"""
+    def _extract_balance(self, text, text_lower):
+        """Extract balance from text (text_lower is text.lower())"""
+        # The pattern starts with the literal 'balance' - skip the scan without it
+        if 'balance' not in text_lower:
+            return None
+        
         # Look for balance indicators
-        balance_pattern = r'balance[:\s]*₹?\s*[\d,]+\.?\d*'
-        match = re.search(balance_pattern, text, re.IGNORECASE)
+        match = self._balance_re.search(text)
         if match:
             return self._clean_amount(match.group())
         return None
     
-    def _is_header_line(self, line):
+    def _is_header_line(self, line_lower):
         """Check if line is a header"""
-        header_keywords = ['date', 'description', 'debit', 'credit', 'balance', 'transaction', 'particulars']
-        line_lower = line.lower()
-        keyword_count = sum(1 for keyword in header_keywords if keyword in line_lower)
-        return keyword_count >= 2
+        # Two keywords need at least 9 characters ('date' + 'debit')
+        if len(line_lower) < 9:
+            return False
+        
+        # Count distinct keywords, as repeated words should not make a header
+        return len(set(self._header_re.findall(line_lower))) >= 2
     
     def _generate_transaction_id(self, user_id, date, amount, description, balance=None):
         """Generate unique transaction ID"""
-        # Include more of the description and balance for uniqueness
-        # This prevents collision when same-day transactions have similar descriptions
-        desc_part = description[:100] if description else ''
-        balance_part = str(balance) if balance else ''
-        unique_string = f"{user_id}_{date}_{amount}_{desc_part}_{balance_part}"
-        return hashlib.md5(unique_string.encode()).hexdigest()
\ No newline at end of file
+        unique_string = transaction_id_source(user_id, date, amount, description, balance)
+        # blake2b with a 16-byte digest keeps the 32-char hex id shape of the old MD5 ids
+        return hashlib.blake2b(unique_string.encode(), digest_size=16).hexdigest()
+
+
+def transaction_id_source(user_id, date, amount, description, balance=None):
+    """String hashed into a transaction ID (also used by migrate_transaction_ids.py)"""
+    # Include more of the description and balance for uniqueness
+    # This prevents collision when same-day transactions have similar descriptions
+    desc_part = description[:100] if description else ''
+    balance_part = str(balance) if balance else ''
+    return f"{user_id}_{date}_{amount}_{desc_part}_{balance_part}"
+
+
+def _extract_block_chunk(transaction_blocks, user_id, keep_raw_line):
+    """Extract a chunk of transaction blocks in a worker process (must be top-level to be picklable)"""
+    return TransactionParser(keep_raw_line=keep_raw_line)._extract_blocks(transaction_blocks, user_id)
@@ -8,12 +8,18 @@ REM Check Python
 echo Checking Python installation...
 python --version >nul 2>&1
 if errorlevel 1 (
-    echo ❌ Python not found. Please install Python 3.8+
+    echo ❌ Python not found. Please install Python 3.10+
     exit /b 1
 ) else (
     python --version
     echo ✓ Python found
 )
+REM The parser uses dataclass(slots=True), added in Python 3.10
+python -c "import sys; sys.exit(sys.version_info < (3, 10))"
+if errorlevel 1 (
+    echo ❌ Python 3.10+ is required
+    exit /b 1
+)
 
 REM Check Node.js
 echo Checking Node.js installation...
@@ -76,10 +82,6 @@ if exist requirements.txt (
     echo ⚠ requirements.txt not found, skipping Python dependencies installation
 )
 
-echo Downloading spaCy language model...
-python -m spacy download en_core_web_sm
-echo ✓ spaCy model downloaded
-
 echo.
 echo ======================================================================
 echo   Step 3: Node.js Setup
@@ -0,0 +1,23 @@
+"""Regression tests for services/categoryClassifier.py
+
+Run from the project root:
+    python -m unittest discover tests
+"""
+import unittest
+
+from services.categoryClassifier import CategoryClassifier
+
+
+class RuleBasedTest(unittest.TestCase):
+    def test_default_categories(self):
+        classifier = CategoryClassifier()
+        self.assertEqual(classifier.classify_rule_based('UPI/SWIGGY/123'), 'Food')
+        self.assertEqual(classifier.classify_rule_based('NO KNOWN MERCHANT'), 'Other')
+
+    def test_categories_without_keywords(self):
+        classifier = CategoryClassifier(categories={'Food': []})
+        self.assertEqual(classifier.classify_rule_based('UPI/SWIGGY/123'), 'Other')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Regression tests for services/pdfExtractor.py
+
+Run from the project root:
+    python -m unittest discover tests
+"""
+import os
+import tempfile
+import unittest
+
+import fitz  # PyMuPDF
+
+from services.pdfExtractor import PDFExtractor
+from services.transactionParser import TransactionParser
+
+# Column x positions of the synthetic statement
+COLUMNS = (40, 110, 300, 390, 470)
+HEADERS = ('Date', 'Narration', 'Withdrawal', 'Deposit', 'Balance')
+
+
+def _write_unruled_statement(path, pages=3, rows_per_page=4):
+    """Write a statement laid out as text (no ruling lines), one cell per text run
+
+    Returns the (date, description, amount, type) rows written, in order.
+    """
+    doc = fitz.open()
+    expected = []
+    balance = 50000.0
+    for page_num in range(pages):
+        page = doc.new_page(width=612, height=792)
+        y = 60
+        # Every page repeats the column headers
+        for x, header in zip(COLUMNS, HEADERS):
+            page.insert_text((x, y), header, fontsize=9)
+        y += 18
+        for row in range(rows_per_page):
+            day = page_num * rows_per_page + row + 1
+            amount = 100.0 * day + 0.5
+            is_debit = row % 2 == 0
+            balance += -amount if is_debit else amount
+            description = 'UPI/SWIGGY/123' if is_debit else 'NEFT SALARY ACME'
+            cells = (f'{day:02d}/03/2023', description,
+                     f'{amount:,.2f}' if is_debit else '', '' if is_debit else f'{amount:,.2f}',
+                     f'{balance:,.2f}')
+            for x, cell in zip(COLUMNS, cells):
+                if cell:
+                    page.insert_text((x, y), cell, fontsize=8)
+            expected.append((f'2023-03-{day:02d}', description, amount, 'Debit' if is_debit else 'Credit'))
+            y += 14
+    doc.save(path)
+    doc.close()
+    return expected
+
+
+class PyMuPDFTextTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.pdf')
+        os.close(fd)
+        self.expected = _write_unruled_statement(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def _parse(self, need_tables):
+        extractor = PDFExtractor(max_workers=1)
+        extractor.extract(self.path, need_tables=need_tables)
+        transactions = TransactionParser().parse_transactions_from_text(extractor.iter_text_lines(), 'user')
+        return [(t.date, t.description, t.amount, t.type) for t in transactions]
+
+    def test_headers_stay_on_one_line(self):
+        extractor = PDFExtractor()
+        extractor.extract(self.path)
+        self.assertIn('Date Narration Withdrawal Deposit Balance', extractor.text_content[1].split('\n'))
+
+    def test_continuation_page_headers_do_not_join_transactions(self):
+        self.assertEqual(self._parse(need_tables=False), self.expected)
+
+    def test_matches_pdfplumber(self):
+        self.assertEqual(self._parse(need_tables=False), self._parse(need_tables=True))
+
+
+class PdfplumberFallbackTest(unittest.TestCase):
+    def test_textless_pdf_records_pdfplumber_pass(self):
+        # No text for PyMuPDF, so extract() already falls back to pdfplumber
+        fd, path = tempfile.mkstemp(suffix='.pdf')
+        os.close(fd)
+        try:
+            doc = fitz.open()
+            doc.new_page().draw_rect(fitz.Rect(50, 50, 200, 200))
+            doc.save(path)
+            doc.close()
+
+            extractor = PDFExtractor()
+            extractor.extract(path)
+            self.assertTrue(extractor.used_pdfplumber)
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
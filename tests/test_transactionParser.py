@@ -0,0 +1,129 @@
+"""Regression tests for services/transactionParser.py
+
+Run from the project root:
+    python -m unittest discover tests
+"""
+import dataclasses
+import random
+import unittest
+from unittest import mock
+
+from services import transactionParser
+from services.transactionParser import TransactionParser
+
+
+class ExtractDateTest(unittest.TestCase):
+    def setUp(self):
+        self.parser = TransactionParser()
+
+    def test_earlier_pattern_wins_over_leftmost_date(self):
+        # DD/MM/YYYY is tried before DD Mon YYYY, even though it appears later in the line
+        self.assertEqual(self.parser._extract_date('12 Jan 2023 UPI payment 05/01/2023 500.00'), '2023-01-05')
+        # DD/MM/YY is tried before YYYY-MM-DD
+        self.assertEqual(self.parser._extract_date('2023-01-05 NEFT ref 06/01/23 1,200.00'), '2023-01-06')
+
+
+class RegexEngineTest(unittest.TestCase):
+    """Lines must parse the same whether re or RE2 matches them"""
+    SHORT_LINE = '05\xa0Jan\xa02023 UPI/SWIGGY Rs.\xa01,234.56'
+    LONG_LINE = SHORT_LINE + ' REF' * 300
+
+    def setUp(self):
+        self.parser = TransactionParser()
+
+    def _parse(self, line, re2_min_line_length):
+        with mock.patch.object(transactionParser, 'RE2_MIN_LINE_LENGTH', re2_min_line_length):
+            return self.parser.parse_transactions_from_text([line], 'user')
+
+    def test_no_break_spaces(self):
+        transactions = self._parse(self.LONG_LINE, transactionParser.RE2_MIN_LINE_LENGTH)
+        self.assertEqual(len(transactions), 1)
+        self.assertEqual(transactions[0].date, '2023-01-05')
+        self.assertEqual(transactions[0].amount, 1234.56)
+
+    @unittest.skipIf(transactionParser.re2 is None, 'google-re2 is not installed')
+    def test_engines_agree(self):
+        for line in (self.SHORT_LINE, self.LONG_LINE, 'Café12.50 Dr 1,000 ſwiggy Cr'):
+            with self.subTest(line=line[:40]):
+                # Everything on re, then everything on RE2
+                self.assertEqual(self._parse(line, float('inf')), self._parse(line, 0))
+
+
+
+def _fields(transactions):
+    """Transaction fields plus their types, so 5 and 5.0 don't compare equal"""
+    return [[(k, v, type(v)) for k, v in dataclasses.asdict(t).items()] for t in transactions]
+
+
+class TableFrameTest(unittest.TestCase):
+    """The pandas table path must give the same transactions as the row-by-row one"""
+    HEADERS = ('Date', 'Narration', 'Withdrawal Amt.', 'Deposit Amt.', 'Closing Balance')
+    DATES = ('01/02/2023', '15-03-23', '5 Jan 2023', '2023-04-05', '31/13/2023', 'Opening', '')
+    AMOUNTS = ('1,234.56', 'Rs.500', '3,000 Dr', '12,000.50 Cr', '450.00 Dr', '(-200.00)', '-', 'N/A', '', '')
+    NARRATIONS = ('UPI/SWIGGY/123', 'NEFT SALARY ACME', 'ATM WDL', 'Interest credit', '')
+
+    def _rows(self, count):
+        rng = random.Random(7)
+        return [dict(zip(self.HEADERS, (rng.choice(self.DATES), rng.choice(self.NARRATIONS),
+                                        rng.choice(self.AMOUNTS), rng.choice(self.AMOUNTS),
+                                        rng.choice(self.AMOUNTS))))
+                for _ in range(count)]
+
+    def test_matches_row_parser(self):
+        try:
+            import pandas  # noqa: F401
+        except ImportError:
+            self.skipTest('pandas is not installed')
+
+        # Two tables with different headers, each long enough for the frame path
+        rows = self._rows(400)
+        rows += [{'Txn Date': row['Date'], 'Description': row['Narration'], 'Amount': row['Deposit Amt.'],
+                  'Balance': row['Closing Balance']} for row in self._rows(300)]
+
+        parser = TransactionParser()
+        expected = parser.parse_transactions_from_table(rows, 'user')
+        with mock.patch.object(TransactionParser, 'TABLE_DF_MIN_ROWS', 100), \
+                mock.patch.object(parser, '_parse_table_frame', wraps=parser._parse_table_frame) as frame, \
+                self.assertNoLogs(transactionParser.log, 'WARNING'):
+            actual = parser.parse_transactions_from_table_df(rows, 'user')
+
+        self.assertEqual(frame.call_count, 2)
+        self.assertGreater(len(expected), 100)
+        self.assertEqual(_fields(actual), _fields(expected))
+
+
+
+class ParallelTextTest(unittest.TestCase):
+    """Parsing blocks in worker processes must match the serial parser"""
+
+    def _lines(self, count):
+        lines = ['Date Narration Withdrawal Deposit Balance']
+        balance = 10000.0
+        for day in range(count):
+            amount = 10.0 * day + 0.25
+            balance += amount
+            lines.append(f'{day % 28 + 1:02d}/05/2023 NEFT/{day}/ACME {amount:,.2f} {balance:,.2f}')
+            # Continuation lines belong to the block above, wherever the chunks split
+            lines.extend(f'REF {day}-{n} TOWARDS INVOICE' for n in range(day % 3))
+            if day % 7 == 0:
+                lines.append(f'{day % 28 + 1:02d}/05/2023 note without an amount')
+        return lines
+
+    def test_matches_serial_parser(self):
+        lines = self._lines(60)
+        parser = TransactionParser()
+        expected = parser.parse_transactions_from_text(lines, 'user')
+        self.assertGreater(len(expected), 50)
+
+        for workers in (2, 3, 7):
+            with self.subTest(workers=workers), \
+                    mock.patch.object(TransactionParser, 'PARALLEL_MIN_BLOCKS_PER_WORKER', 5), \
+                    mock.patch.object(transactionParser, 'ProcessPoolExecutor',
+                                      wraps=transactionParser.ProcessPoolExecutor) as executor:
+                actual = parser.parse_transactions_from_text_parallel(lines, 'user', workers=workers)
+                executor.assert_called_once_with(max_workers=workers)
+                self.assertEqual(_fields(actual), _fields(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()